@@ -0,0 +1,177 @@
+"""
+    Batch mode of zadanie_1, reads start;end;time;criterion records
+    (criterion t or p, like in zadanie_1) and writes one JSON line
+    per record in input order. Graph is loaded once, at most
+    `window` records are held in memory regardless of input size.
+    With --stats a_star records get SearchStats of their search
+"""
+
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import json
+import multiprocessing
+import sys
+import time
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, TextIO
+from graph import Edge, Graph, Timestamp
+from query_cache import QueryCache
+from search_stats import SearchStats
+import zadanie_1
+
+ENGINES = ("a_star", "csa")
+WINDOW_PER_WORKER = 32
+
+_graph: Optional[Graph] = None
+
+
+def load_graph() -> Graph:
+    """Replayed traffic repeats queries, a_star results are cached"""
+    graph = zadanie_1.load_graph()
+    graph.query_cache = QueryCache()
+    return graph
+
+
+def init_worker(inherited: bool) -> None:
+    global _graph
+    if not inherited:
+        _graph = load_graph()
+
+
+def edge_to_dict(edge: Edge) -> Dict[str, str]:
+    return {
+        "line": edge.line,
+        "departure": edge.departure_time.time_str,
+        "arrival": edge.arrival_time.time_str,
+        "dest": edge.dest.stop_name,
+    }
+
+
+def run_query(record: str, engine: str = "a_star", stats: bool = False) -> Dict[str, Any]:
+    """
+    Result of single record, invalid records get `error` instead of path.
+    Cached a_star results have empty `stats`, their search was not run.
+    Stats callback of the graph, if any, still receives every search
+    """
+    result: Dict[str, Any] = {"query": record}
+    fields = [field.strip() for field in record.split(";")]
+    if len(fields) != 4:
+        result["error"] = "Oczekiwano rekordu start;koniec;czas;kryterium"
+        return result
+    start_name, end_name, time_str, criterion = fields
+    for stop_name in (start_name, end_name):
+        if stop_name not in _graph.graph:
+            result["error"] = f"Nieznaleziono przystanku: {stop_name}"
+            return result
+    try:
+        start_time = Timestamp.create_timestamp(zadanie_1.validate_time_format(time_str))
+    except argparse.ArgumentTypeError as error:
+        result["error"] = str(error)
+        return result
+    if criterion not in ("t", "p") or (engine == "csa" and criterion != "t"):
+        result["error"] = f"Nieobsługiwane kryterium: {criterion}"
+        return result
+
+    start, end = _graph.graph[start_name], _graph.graph[end_name]
+    search_stats: List[SearchStats] = []
+    graph_callback = _graph.stats_callback
+    if stats:
+        def record_search(search: SearchStats) -> None:
+            search_stats.append(search)
+            if graph_callback is not None:
+                graph_callback(search)
+
+        _graph.stats_callback = record_search
+    query_start = time.perf_counter()
+    try:
+        if engine == "csa":
+            path, visited, cost = _graph.connection_scan(start, end, start_time)
+        else:
+            criteria = 'time' if criterion == 't' else 'hops'
+            path, visited, cost = _graph.a_star(start, end, start_time, criteria)
+    finally:
+        _graph.stats_callback = graph_callback
+    result.update(
+        path=None if path is None else [edge_to_dict(edge) for edge in path],
+        cost=cost,
+        visited=visited,
+        latency=time.perf_counter() - query_start,
+    )
+    if stats:
+        result["stats"] = [search.to_dict() for search in search_stats]
+    return result
+
+
+def read_records(stream: TextIO) -> Iterator[str]:
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield line
+
+
+def run_batch(
+    records: Iterable[str],
+    output: TextIO,
+    engine: str = "a_star",
+    workers: int = 1,
+    window: Optional[int] = None,
+    stats: bool = False,
+) -> None:
+    """
+    With `workers` > 1 records are queried in process pool,
+    results are written as soon as all earlier ones are
+    """
+    write = lambda result: output.write(json.dumps(result, ensure_ascii=False) + "\n")
+    if workers <= 1:
+        for record in records:
+            write(run_query(record, engine, stats))
+        return
+
+    window = window or workers * WINDOW_PER_WORKER
+    fork = "fork" in multiprocessing.get_all_start_methods()
+    with ProcessPoolExecutor(
+        workers,
+        mp_context=multiprocessing.get_context("fork" if fork else "spawn"),
+        initializer=init_worker,
+        initargs=(fork,),
+    ) as executor:
+        pending: Deque = deque()
+        for record in records:
+            pending.append(executor.submit(run_query, record, engine, stats))
+            if len(pending) >= window:
+                write(pending.popleft().result())
+        while pending:
+            write(pending.popleft().result())
+
+
+def get_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog="batch",
+        description="""
+            Wsadowe wyszukiwanie połączeń, rekordy start;koniec;czas;kryterium
+            w kolejnych liniach, wyniki jako JSON Lines w kolejności wejścia
+        """.strip().replace("\t", "")
+    )
+    parser.add_argument(
+        "input",
+        help="Plik z zapytaniami (domyślnie standardowe wejście)",
+        nargs="?",
+        type=argparse.FileType("r", encoding="utf-8"),
+        default=sys.stdin,
+    )
+    parser.add_argument("-e", "--engine", help="Algorytm wyszukiwania", choices=ENGINES, default="a_star")
+    parser.add_argument("-w", "--workers", help="Liczba procesów (domyślnie 1)", type=int, default=1)
+    parser.add_argument("-s", "--stats", help="Dołącz liczniki pracy wyszukiwania", action="store_true")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    global _graph
+    args = get_args(argv)
+    _graph = load_graph()
+    with args.input:
+        run_batch(read_records(args.input), sys.stdout, args.engine, args.workers, stats=args.stats)
+
+
+if __name__ == '__main__':
+    main()
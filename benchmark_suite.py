@@ -0,0 +1,305 @@
+"""
+    Reproducible benchmarks of graph load, searches and tabu search.
+    Query sets are drawn with fixed seed, every case is warmed up, timed
+    with perf_counter and summarised by percentiles in JSON, e.g.
+        python benchmark_suite.py run -o baseline.json
+        python benchmark_suite.py compare baseline.json current.json --threshold 0.1
+"""
+
+import argparse
+from dataclasses import dataclass, field
+import json
+import math
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Tuple
+import numpy as np
+from graph import Graph, Node, Timestamp
+from graph_benchmark import get_test_data_between_distance
+from search_queue import QUEUES
+from tabu import Tabu
+
+DATA_FILE_PATH = "connection_graph.csv"
+# km, the same bands as extras/a_star_close.md, a_star_medium.md and a_star_far.md
+DISTANCE_BANDS = {"close": (0, 3), "medium": (3, 7), "far": (7, math.inf)}
+PERCENTILES = (50, 95, 99)
+Query = Tuple[Node, Node, Timestamp]
+
+
+@dataclass
+class BenchmarkConfig:
+    data: str = DATA_FILE_PATH
+    seed: int = 255
+    queries: int = 30
+    warmup: int = 3
+    repeat: int = 1
+    load_repeat: int = 3
+    tabu_tours: int = 3
+    tabu_stops: int = 5
+    compact: bool = False
+    only: List[str] = field(default_factory=list)
+
+
+def summarise(samples: List[float], **extra: Any) -> Dict[str, Any]:
+    """Percentiles of timings in seconds"""
+    summary: Dict[str, Any] = {"count": len(samples)}
+    if samples:
+        values = np.percentile(samples, PERCENTILES)
+        summary.update({f"p{p}": float(value) for p, value in zip(PERCENTILES, values)})
+        summary.update(mean=float(np.mean(samples)), min=min(samples), max=max(samples))
+    summary.update(extra)
+    return summary
+
+
+def time_queries(
+    search: Callable, queries: List[Query], warmup: int, repeat: int, **kwargs
+) -> Dict[str, Any]:
+    """First `warmup` queries are run once untimed, then every query `repeat` times"""
+    for start, end, start_time in queries[:warmup]:
+        search(start, end, start_time, **kwargs)
+    samples = []
+    visited = []
+    failed = 0
+    for start, end, start_time in queries:
+        for _ in range(repeat):
+            query_start = time.perf_counter()
+            result = search(start, end, start_time, **kwargs)
+            samples.append(time.perf_counter() - query_start)
+        # Graph.dijkstra returns (path, visited) only
+        path, visited_count = result[0], result[1]
+        if path is None:
+            failed += 1
+        else:
+            visited.append(visited_count)
+    return summarise(
+        samples, failed=failed, visited_mean=float(np.mean(visited)) if visited else None
+    )
+
+
+def band_queries(graph: Graph, config: BenchmarkConfig) -> Dict[str, List[Query]]:
+    queries = {}
+    for band, (low, high) in DISTANCE_BANDS.items():
+        random.seed(config.seed)
+        queries[band] = get_test_data_between_distance(
+            graph, config.queries, low, high, max_tries=config.queries * 50
+        )
+    return queries
+
+
+def load_benchmarks(config: BenchmarkConfig) -> Dict[str, Dict[str, Any]]:
+    results = {}
+    samples = []
+    for _ in range(config.load_repeat):
+        load_start = time.perf_counter()
+        Graph(config.data, compact=config.compact)
+        samples.append(time.perf_counter() - load_start)
+    results["load_csv"] = summarise(samples)
+
+    # data directory may be read-only
+    with tempfile.TemporaryDirectory() as directory:
+        snapshot_path = os.path.join(directory, "benchmark.snapshot")
+        Graph(config.data, compact=True).save_snapshot(snapshot_path)
+        samples = []
+        for _ in range(config.load_repeat):
+            load_start = time.perf_counter()
+            Graph.load_snapshot(snapshot_path, config.data)
+            samples.append(time.perf_counter() - load_start)
+        results["load_snapshot"] = summarise(samples)
+    return results
+
+
+def search_cases(graph: Graph) -> List[Tuple[str, Callable, Dict[str, Any]]]:
+    """
+    (name, search, kwargs), classic-only searches are skipped on compact graph.
+    Searches taking `queue` are also run with every other queue kind
+    they accept, named like dijkstra_heapq:bucket
+    """
+    cases = [("dijkstra_heapq", graph.dijkstra_heapq, {})]
+    if not graph.compact:
+        cases += [
+            ("dijkstra", graph.dijkstra, {}),
+            ("dijkstra_py_prority_que", graph.dijkstra_py_prority_que, {}),
+        ]
+    cases += [
+        ("a_star_time", graph.a_star, {"criteria": "time"}),
+        ("a_star_hops", graph.a_star, {"criteria": "hops"}),
+        ("connection_scan", graph.connection_scan, {}),
+        ("latest_departure", graph.latest_departure, {}),
+    ]
+    for kind, queue_class in QUEUES.items():
+        if kind == "heap":
+            continue
+        cases += [
+            (f"dijkstra_heapq:{kind}", graph.dijkstra_heapq, {"queue": kind}),
+            (f"latest_departure:{kind}", graph.latest_departure, {"queue": kind}),
+        ]
+        if not graph.compact:
+            cases.append(
+                (f"dijkstra_py_prority_que:{kind}", graph.dijkstra_py_prority_que, {"queue": kind})
+            )
+        # a_star estimates are not monotone
+        if not queue_class.MONOTONE:
+            cases += [
+                (f"a_star_time:{kind}", graph.a_star, {"criteria": "time", "queue": kind}),
+                (f"a_star_hops:{kind}", graph.a_star, {"criteria": "hops", "queue": kind}),
+            ]
+    return cases
+
+
+def search_benchmarks(graph: Graph, config: BenchmarkConfig) -> Dict[str, Dict[str, Any]]:
+    results = {}
+    queries = band_queries(graph, config)
+    for name, search, kwargs in search_cases(graph):
+        for band, band_set in queries.items():
+            key = f"{name}/{band}"
+            if config.only and not any(key.startswith(prefix) for prefix in config.only):
+                continue
+            results[key] = time_queries(search, band_set, config.warmup, config.repeat, **kwargs)
+    return results
+
+
+def tabu_benchmarks(graph: Graph, config: BenchmarkConfig) -> Dict[str, Dict[str, Any]]:
+    random.seed(config.seed)
+    nodes = list(graph.graph.values())
+    tours = [
+        random.sample(nodes, config.tabu_stops + 1) for _ in range(config.tabu_tours)
+    ]
+    start_time = Timestamp.create_timestamp("08:00")
+    results = {}
+    for criteria in ("time", "hops"):
+        samples = []
+        costs = []
+        for tour in tours:
+            random.seed(config.seed)
+            tabu = Tabu(graph, criteria)
+            tabu.TABU_LEN = len(tour) - 2
+            search_start = time.perf_counter()
+            _, _, cost = tabu.tabu_search_v2(tour[0], tour[1:], start_time)
+            samples.append(time.perf_counter() - search_start)
+            costs.append(cost)
+        results[f"tabu_search_v2/{criteria}"] = summarise(samples, costs=costs)
+    return results
+
+
+def run(config: BenchmarkConfig) -> Dict[str, Any]:
+    benchmarks: Dict[str, Dict[str, Any]] = {}
+    selected = lambda group: not config.only or any(
+        group.startswith(prefix) or prefix.startswith(group) for prefix in config.only
+    )
+    if selected("load"):
+        benchmarks.update(load_benchmarks(config))
+    graph = Graph(config.data, compact=config.compact)
+    benchmarks.update(search_benchmarks(graph, config))
+    if selected("tabu_search_v2"):
+        benchmarks.update(tabu_benchmarks(graph, config))
+    return {
+        "meta": {
+            "data": os.path.basename(config.data),
+            "data_size": os.path.getsize(config.data),
+            "seed": config.seed,
+            "queries": config.queries,
+            "warmup": config.warmup,
+            "repeat": config.repeat,
+            "compact": config.compact,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "benchmarks": benchmarks,
+    }
+
+
+def compare(
+    baseline: Dict[str, Any], current: Dict[str, Any], threshold: float, metric: str
+) -> List[str]:
+    """Names of benchmarks slower than baseline by more than `threshold`"""
+    for key in ("data", "data_size", "seed", "queries", "compact"):
+        if baseline["meta"].get(key) != current["meta"].get(key):
+            print(f"Uwaga: różne {key}: {baseline['meta'].get(key)} != {current['meta'].get(key)}", file=sys.stderr)
+    regressions = []
+    print(f"{'benchmark':40} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, base in baseline["benchmarks"].items():
+        result = current["benchmarks"].get(name)
+        if result is None or metric not in base or metric not in result:
+            print(f"{name:40} {'brak':>12}")
+            continue
+        change = result[metric] / base[metric] - 1 if base[metric] else 0.0
+        regressed = change > threshold
+        if regressed:
+            regressions.append(name)
+        print(
+            f"{name:40} {base[metric]:12.6f} {result[metric]:12.6f} {change:+8.1%}"
+            f"{'  REGRESJA' if regressed else ''}"
+        )
+    return regressions
+
+
+def get_args():
+    parser = argparse.ArgumentParser(
+        prog="benchmark_suite",
+        description="Powtarzalne testy wydajności z wynikami w JSON",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    defaults = BenchmarkConfig()
+    run_parser = commands.add_parser("run", help="Uruchom testy")
+    run_parser.add_argument("-d", "--data", help="Plik z rozkładem", default=defaults.data)
+    run_parser.add_argument("-o", "--output", help="Plik wynikowy JSON (domyślnie stdout)")
+    run_parser.add_argument("--seed", type=int, default=defaults.seed)
+    run_parser.add_argument("--queries", help="Liczba zapytań w paśmie odległości", type=int, default=defaults.queries)
+    run_parser.add_argument("--warmup", help="Liczba zapytań rozgrzewających", type=int, default=defaults.warmup)
+    run_parser.add_argument("--repeat", help="Liczba powtórzeń zapytania", type=int, default=defaults.repeat)
+    run_parser.add_argument("--load-repeat", help="Liczba powtórzeń wczytania", type=int, default=defaults.load_repeat)
+    run_parser.add_argument("--tabu-tours", type=int, default=defaults.tabu_tours)
+    run_parser.add_argument("--tabu-stops", type=int, default=defaults.tabu_stops)
+    run_parser.add_argument("--compact", help="Graf bez obiektów Edge", action="store_true")
+    run_parser.add_argument("--only", help="Tylko testy o podanych prefiksach nazw", nargs="+", default=[])
+
+    compare_parser = commands.add_parser("compare", help="Porównaj wyniki z bazowymi")
+    compare_parser.add_argument("baseline", help="Bazowy plik JSON")
+    compare_parser.add_argument("current", help="Nowy plik JSON")
+    compare_parser.add_argument(
+        "-t", "--threshold", help="Dopuszczalny względny wzrost czasu", type=float, default=0.1
+    )
+    compare_parser.add_argument("-m", "--metric", choices=[f"p{p}" for p in PERCENTILES] + ["mean"], default="p50")
+    return parser.parse_args()
+
+
+def main():
+    args = get_args()
+    if args.command == "compare":
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+        with open(args.current, encoding="utf-8") as file:
+            current = json.load(file)
+        regressions = compare(baseline, current, args.threshold, args.metric)
+        if regressions:
+            print(f"Regresja wydajności: {', '.join(regressions)}", file=sys.stderr)
+            exit(1)
+        return
+
+    config = BenchmarkConfig(
+        data=args.data,
+        seed=args.seed,
+        queries=args.queries,
+        warmup=args.warmup,
+        repeat=args.repeat,
+        load_repeat=args.load_repeat,
+        tabu_tours=args.tabu_tours,
+        tabu_stops=args.tabu_stops,
+        compact=args.compact,
+        only=args.only,
+    )
+    results = json.dumps(run(config), indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(results + "\n")
+    else:
+        print(results)
+
+
+if __name__ == '__main__':
+    main()
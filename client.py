@@ -0,0 +1,71 @@
+"""
+    Thin client of server.py, takes the same arguments and prints
+    the same output as zadanie_1 / zadanie_2, e.g.
+        python client.py zadanie_1 "PL. GRUNWALDZKI" "FAT" 08:00 t
+    Without running server the program is run locally
+"""
+
+import argparse
+import importlib
+import json
+import os
+import socket
+import sys
+import tempfile
+from typing import Any, Dict, List, Optional
+
+SOCKET_PATH = os.path.join(tempfile.gettempdir(), "jak_dojade.sock")
+PROGRAMS = ("zadanie_1", "zadanie_2")
+
+
+def request(
+    program: str,
+    argv: List[str],
+    socket_path: str = SOCKET_PATH,
+    port: Optional[int] = None,
+) -> Dict[str, Any]:
+    if port is not None:
+        connection = socket.create_connection(("127.0.0.1", port))
+    else:
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            connection.connect(socket_path)
+        except OSError:
+            connection.close()
+            raise
+    with connection, connection.makefile("rwb") as stream:
+        stream.write(json.dumps({"program": program, "argv": argv}).encode() + b"\n")
+        stream.flush()
+        line = stream.readline()
+    if not line:
+        raise ConnectionError("Server closed connection")
+    return json.loads(line)
+
+
+def get_args():
+    parser = argparse.ArgumentParser(
+        prog="client",
+        description="Klient serwera wyszukiwania połączeń",
+    )
+    parser.add_argument("-s", "--socket", help="Ścieżka gniazda Unix", default=SOCKET_PATH)
+    parser.add_argument("-p", "--port", help="Port TCP serwera na localhost", type=int)
+    parser.add_argument("program", choices=PROGRAMS)
+    parser.add_argument("argv", nargs=argparse.REMAINDER, help="Argumenty programu")
+    return parser.parse_args()
+
+
+def main():
+    args = get_args()
+    try:
+        response = request(args.program, args.argv, args.socket, args.port)
+    except OSError:
+        print("Serwer niedostępny, obliczenia lokalne", file=sys.stderr)
+        importlib.import_module(args.program).main(args.argv)
+        return
+    sys.stdout.write(response["stdout"])
+    sys.stderr.write(response["stderr"])
+    exit(response["code"])
+
+
+if __name__ == '__main__':
+    main()
@@ -2,20 +2,28 @@
     Class for Graph, Nodes and Edges
 """
 
+from bisect import bisect_left, bisect_right
 from collections import defaultdict
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from decimal import Decimal
-from functools import cache
-import heapq
 import math
+import os
 from numbers import Number
 import time
-from typing import Any, Callable, Dict, Generator, List, Literal, Optional, Tuple, Union
+from typing import Any, Callable, Dict, Generator, Iterator, List, Literal, Optional, Sequence, Set, Tuple, Union
 from queue import SimpleQueue
+import zipfile
 from priority_queue import PriorityQueue
 from heapq_priority_item import PriorityItem
+from landmarks import Landmarks
+from query_cache import QueryCache
+from raptor import RaptorIndex
+from search_queue import create_queue
+from search_stats import SearchStats, StatsCallback
+from snapshot import SnapshotError, load_timetable, save_timetable
+from timetable import TIME_DTYPE, Timetable
+import numpy as np
 import queue as q
-import pandas as pd
 
 
 @dataclass
@@ -42,6 +50,13 @@ class Timestamp:
         time_int = h * 3600 + m * 60 + s
         return cls(time_str, time_int)
 
+    @classmethod
+    def from_seconds(cls, seconds: int) -> "Timestamp":
+        seconds = int(seconds)
+        minutes, s = divmod(seconds, 60)
+        h, m = divmod(minutes, 60)
+        return cls(f"{h:02d}:{m:02d}:{s:02d}", seconds)
+
     def __hash__(self) -> int:
         return hash(self.time)
 
@@ -61,20 +76,37 @@ class Timestamp:
         return self.time < other.time
 
 
+EARTH_RADIUS = 6_371
+
+
+def unit_vectors(latitude: np.ndarray, longitude: np.ndarray) -> np.ndarray:
+    """Cartesian x,y,z of coordinates, same convention as Node.distance"""
+    latitude_rad = np.radians(latitude)
+    longitude_rad = np.radians(longitude)
+    return np.column_stack(
+        (
+            np.cos(latitude_rad) * np.cos(longitude_rad),
+            np.sin(latitude_rad) * np.cos(longitude_rad),
+            np.sin(longitude_rad),
+        )
+    )
+
+
 @dataclass
 class Node:
     stop_name: str
     latitude: float
     longitude: float
     neighbours: List["Edge"]
+    id: int = field(default=-1, compare=False)
 
-    @cache
     def distance(self, other: "Node") -> int:
         """
         Distance between two points, ignores earth curvture.
-        Converts spherical coordinate into Carthesian x,y,z
+        Converts spherical coordinate into Carthesian x,y,z.
+        For many stops use Graph.distances_to
         """
-        radius = 6_371
+        radius = EARTH_RADIUS
         self_latitude_rad = math.radians(self.latitude)
         self_longitude_rad = math.radians(self.longitude)
         other_latitude_rad = math.radians(other.latitude)
@@ -115,42 +147,264 @@ class Edge:
         return self.arrival_time.time - self.departure_time.time
 
 
+@dataclass
+class EarliestArrivalTree:
+    """
+    Earliest arrival at every stop, indexed by stop id.
+    Unreached stops have arrival UNREACHABLE and predecessor -1,
+    predecessor is the timetable row used to reach the stop
+    """
+
+    UNREACHABLE = int(np.iinfo(TIME_DTYPE).max)
+
+    start: int
+    start_time: int
+    arrival: np.ndarray
+    predecessor: np.ndarray
+    parent: np.ndarray
+
+    def reachable(self) -> np.ndarray:
+        """Ids of all reached stops, including start"""
+        return np.flatnonzero(self.arrival != self.UNREACHABLE)
+
+
+class SearchLabels:
+    """
+    Distance and prev labels of a search indexed by stop id.
+    Arrays are reused between queries, label is valid only when its
+    stamp equals current generation, so reset is O(1).
+    Note:
+        - Single search at a time, each Graph owns one instance
+        - Searches count stamped stops as visited, same as number
+          of keys of the defaultdict labels they replace
+    """
+
+    def __init__(self, size: int) -> None:
+        self.distance: List[Number] = [float("inf")] * size
+        self.prev: List[Optional[Tuple[Any, Any]]] = [None] * size
+        self.stamp: List[int] = [0] * size
+        self.generation = 0
+
+    def reset(self, start: int) -> int:
+        """Starts new search labelling only `start`, returns its generation"""
+        self.generation += 1
+        self.stamp[start] = self.generation
+        self.distance[start] = 0
+        self.prev[start] = None
+        return self.generation
+
+
+SNAPSHOT_SUFFIX = ".snapshot"
+LANDMARKS_SUFFIX = ".landmarks.npz"
+
+
 class Graph:
-    def __init__(self, filepath: str, cost_estimation_scale=1_100, hop_penalty=920, hub_bonus=0):
+    def __init__(
+        self,
+        filepath: Optional[str],
+        cost_estimation_scale=1_100,
+        hop_penalty=920,
+        hub_bonus=0,
+        compact: bool = False,
+        timetable: Optional[Timetable] = None,
+        next_departure_table: bool = False,
+        query_cache: Optional[QueryCache] = None,
+        stats_callback: Optional[StatsCallback] = None,
+    ):
+        """
+        With `compact` set connections are kept only in `self.timetable`
+        arrays, node.neighbours stay empty and Edge objects are created
+        only for returned paths. When `timetable` is given
+        `filepath` is only recorded as its source.
+        `next_departure_table` makes searches relax only the earliest
+        departure towards each (neighbour, line) instead of all of them.
+        `query_cache` keeps a_star results between calls.
+        `stats_callback` receives SearchStats of every dijkstra_heapq,
+        a_star, latest_departure and connection_scan search and of every
+        earliest_arrival_tree scan, cached a_star results are not searched.
+        Graph.load sets self.landmarks_path to the file next to the CSV,
+        landmarks computed on demand are then saved there
+        """
         self.hub_bonus = hub_bonus
         self.cost_estimation_scale = cost_estimation_scale
         self.hop_penalty = hop_penalty
+        self.source_path = filepath
+        self.compact = compact
         self.graph: Dict[str, Node] = {}
-        connections = pd.read_csv(filepath, low_memory=False)
-
-        start_stops = connections[["start_stop", "start_stop_lat", "start_stop_lon"]]
-        start_stops.columns = ["stop", "lat", "lon"]
-        end_stops = connections[["end_stop", "end_stop_lat", "end_stop_lon"]]
-        end_stops.columns = ["stop", "lat", "lon"]
-
-        stops_concat = pd.concat([start_stops, end_stops])
-        stops_concat.drop_duplicates()
-        stop_groups_df = stops_concat.groupby("stop").mean()
-        stop_groups = list(stop_groups_df.itertuples(index=True, name=None))
-        for stop in stop_groups:
-            self.graph[stop[0]] = Node(*stop, [])
-
-        for connection in connections.to_numpy():
-            company = connection[1]
-            line = connection[2]
-            dep_time = Timestamp.create_timestamp(connection[3])
-            arr_time = Timestamp.create_timestamp(connection[4])
-            start_stop_id = connection[5]
-            end_stop_id = connection[6]
-
-            start_node = self.graph[start_stop_id]
-            end_node = self.graph[end_stop_id]
-
-            start_node.neighbours.append(
-                (Edge(dep_time, arr_time, end_node, company, line))
+        self.nodes: List[Node] = []
+        if timetable is None:
+            timetable = Timetable.from_csv(filepath)
+        self.timetable = timetable
+        self.raptor_index: Optional[RaptorIndex] = None
+        self.unit_vectors = unit_vectors(timetable.latitude, timetable.longitude)
+        self.landmarks: Optional[Landmarks] = None
+        self.landmarks_path: Optional[str] = None
+        self.query_cache = query_cache
+        self.stats_callback = stats_callback
+        for stop_id, stop in enumerate(
+            zip(
+                self.timetable.stop_names,
+                self.timetable.latitude.tolist(),
+                self.timetable.longitude.tolist(),
             )
-        for node in self.graph.values():
-            node.neighbours = sorted(node.neighbours, key=lambda e: e.departure_time.time)
+        ):
+            node = Node(*stop, [], stop_id)
+            self.graph[stop[0]] = node
+            self.nodes.append(node)
+        self.labels = SearchLabels(len(self.nodes))
+        if not self.compact:
+            self.create_edges()
+        if next_departure_table:
+            timetable.build_next_departure_table()
+
+    @classmethod
+    def load_snapshot(cls, path: str, source: Optional[str] = None, **kwargs) -> "Graph":
+        """
+        Compact graph over memory-mapped snapshot, with `source` given
+        raises StaleSnapshotError when the CSV changed since it was saved
+        """
+        kwargs.setdefault("compact", True)
+        return cls(source, timetable=load_timetable(path, source), **kwargs)
+
+    def save_snapshot(self, path: str) -> None:
+        save_timetable(self.timetable, path, self.source_path)
+
+    @classmethod
+    def load(cls, filepath: str, snapshot_path: Optional[str] = None, **kwargs) -> "Graph":
+        """
+        Loads graph from snapshot next to CSV, when it is missing
+        or outdated rebuilds graph from CSV and writes new snapshot.
+        Landmarks saved next to CSV are loaded when newer than it,
+        otherwise they are saved there once computed
+        """
+        snapshot_path = snapshot_path or filepath + SNAPSHOT_SUFFIX
+        kwargs.setdefault("compact", True)
+        try:
+            graph = cls.load_snapshot(snapshot_path, filepath, **kwargs)
+        except SnapshotError:
+            graph = cls(filepath, **kwargs)
+            try:
+                graph.save_snapshot(snapshot_path)
+            except OSError:
+                pass  # read-only location, snapshot is only an optimisation
+        landmarks_path = graph.landmarks_path = filepath + LANDMARKS_SUFFIX
+        if (
+            os.path.exists(landmarks_path)
+            and os.path.getmtime(landmarks_path) >= os.path.getmtime(filepath)
+        ):
+            try:
+                graph.load_landmarks(landmarks_path)
+            except (OSError, ValueError, zipfile.BadZipFile):
+                pass  # stale landmarks are recomputed on demand
+        return graph
+
+    def create_edges(self) -> None:
+        """
+        Fills node.neighbours from timetable rows, which are already
+        sorted by departure. Timestamps of equal time are shared
+        """
+        timetable = self.timetable
+        timestamps: Dict[int, Timestamp] = {}
+
+        def timestamp(seconds: int) -> Timestamp:
+            stamp = timestamps.get(seconds)
+            if stamp is None:
+                stamp = timestamps[seconds] = Timestamp.from_seconds(seconds)
+            return stamp
+
+        offsets = timetable.offsets.tolist()
+        departure = timetable.departure.tolist()
+        arrival = timetable.arrival.tolist()
+        dest = timetable.dest.tolist()
+        line = timetable.line.tolist()
+        company = timetable.company.tolist()
+        for node in self.nodes:
+            node.neighbours = [
+                Edge(
+                    timestamp(departure[connection]),
+                    timestamp(arrival[connection]),
+                    self.nodes[dest[connection]],
+                    timetable.companies[company[connection]],
+                    timetable.lines[line[connection]],
+                )
+                for connection in range(offsets[node.id], offsets[node.id + 1])
+            ]
+
+    def distances_to(self, node: Node) -> np.ndarray:
+        """Node.distance from `node` to every stop, indexed by stop id"""
+        difference = self.unit_vectors - self.unit_vectors[node.id]
+        return EARTH_RADIUS * np.sqrt(np.einsum("ij,ij->i", difference, difference))
+
+    def precompute_landmarks(self, count: int = 16, path: Optional[str] = None) -> None:
+        """
+        Selects `count` landmarks and their minimum-duration distances
+        to and from every stop, optionally saves them to `path`.
+        Without `path` they are saved to landmarks_path when set
+        """
+        self.landmarks = Landmarks.compute(self.timetable, count)
+        if path:
+            self.landmarks.save(path)
+        elif self.landmarks_path:
+            try:
+                self.landmarks.save(self.landmarks_path)
+            except OSError:
+                pass  # read-only location, landmarks are computed again next time
+
+    def load_landmarks(self, path: str) -> None:
+        landmarks = Landmarks.load(path)
+        if landmarks.to_landmark.shape[1] != self.timetable.stop_count:
+            raise ValueError(f"Landmarks {path} were computed for other graph")
+        self.landmarks = landmarks
+
+    def landmark_bounds(self, end_node: Node) -> List[float]:
+        """Lower bounds of travel time to end_node, computes landmarks if needed"""
+        if self.landmarks is None:
+            self.precompute_landmarks()
+        return self.landmarks.lower_bounds(end_node.id)
+
+    def departures_from(self, stop: int, time: int) -> Sequence[int]:
+        """
+        Timetable rows of `stop` worth relaxing at `time`, departed
+        connections are skipped with bisect instead of being compared
+        """
+        timetable = self.timetable
+        if timetable.has_next_departure_table:
+            return timetable.next_departures(stop, time)
+        return range(timetable.first_departure(stop, time), timetable.offsets_view[stop + 1])
+
+    def edges_from(self, node: Node, time: int) -> Iterator[Edge]:
+        """
+        Edges of departures_from(node.id, time), on compact graph
+        they are created from timetable rows
+        """
+        rows = self.departures_from(node.id, time)
+        if self.compact:
+            return map(self.get_edge, rows)
+        edges = node.neighbours
+        first_row = self.timetable.offsets_view[node.id]
+        return (edges[row - first_row] for row in rows)
+
+    def get_edge(self, connection: int) -> Edge:
+        """Materialises timetable row as Edge"""
+        timetable = self.timetable
+        return Edge(
+            Timestamp.from_seconds(timetable.departure_view[connection]),
+            Timestamp.from_seconds(timetable.arrival_view[connection]),
+            self.nodes[timetable.dest_view[connection]],
+            timetable.companies[timetable.company_view[connection]],
+            timetable.lines[timetable.line_view[connection]],
+        )
+
+    def get_compact_path(
+        self, prev: Dict[int, Tuple[int, int]], start: int, end: int
+    ) -> List[Edge]:
+        """Same as get_path, but on stop ids and timetable rows"""
+        current = end
+        connections = []
+        while current != start:
+            current, connection = prev[current]
+            connections.append(connection)
+        return [self.get_edge(connection) for connection in reversed(connections)]
 
     def distinct_edge_bfs(
         self, node: Node, func: Callable[[Node, Edge], Any]
@@ -160,6 +414,9 @@ class Graph:
         Distinct edge is one of the edges with same src and dest
         Used only for graph display
         """
+        if self.compact:
+            yield from self._distinct_edge_bfs_compact(node, func)
+            return
         visited: Tuple[Node, Node] = set()
         queue = SimpleQueue()
         queue.put_nowait(node)
@@ -174,122 +431,267 @@ class Graph:
                     queue.put_nowait(dest)
                     yield func(current, edge)
 
+    def _distinct_edge_bfs_compact(
+        self, node: Node, func: Callable[[Node, Edge], Any]
+    ) -> Generator:
+        timetable = self.timetable
+        dest = timetable.dest_view
+        visited: Set[Tuple[int, int]] = set()
+        queue = SimpleQueue()
+        queue.put_nowait(node.id)
+        while not queue.empty():
+            current = queue.get_nowait()
+            for connection in timetable.connections(current):
+                id_tuple = (current, dest[connection])
+                if id_tuple not in visited:
+                    visited.add(id_tuple)
+                    queue.put_nowait(dest[connection])
+                    yield func(self.nodes[current], self.get_edge(connection))
+
     def dijkstra(
-        self, start_node: Node, end_node: Node, start_time: Timestamp
+        self, start_node: Node, end_node: Node, start_time: Timestamp, queue: Optional[str] = None
     ) -> Tuple[Optional[List[Edge]], Optional[Number], Optional[Number]]:
         """
         Inefficient dijkstra alghoritm on linked list priority queue,
-        first solution
+        first solution. Other `queue` is kind of search_queue.QUEUES
         """
-        distance: Dict[Node, Number] = defaultdict(lambda: float("inf"))
-        prev: Dict[Node, Tuple[Node, Edge]] = defaultdict()
-        distance[start_node] = 0
+        labels = self.labels
+        distance, prev, stamp = labels.distance, labels.prev, labels.stamp
+        generation = labels.reset(start_node.id)
+        inf = float("inf")
+        visited = 1
 
         def dijkstra_distance_strategy(node):
-            return distance[node]
+            return distance[node.id]
 
-        queue = PriorityQueue(dijkstra_distance_strategy, start_node, start_time)
-        while not queue.is_empty():
-            current, arrival = queue.dequeue()
+        if queue is None:
+            linked_queue = PriorityQueue(dijkstra_distance_strategy, start_node, start_time)
+            is_empty, dequeue, enqueue = (
+                linked_queue.is_empty, linked_queue.dequeue, linked_queue.enqueue
+            )
+        else:
+            entries = create_queue(queue, monotone=True)
+            entries.push(start_time.time, start_time, start_node)
+
+            def is_empty() -> bool:
+                return not entries
+
+            def dequeue() -> Tuple[Node, Timestamp]:
+                _, arrival, node = entries.pop()
+                return node, arrival
+
+            def enqueue(node: Node, arrival: Timestamp) -> None:
+                entries.push(arrival.time, arrival, node)
+
+        while not is_empty():
+            current, arrival = dequeue()
             if end_node is current:
-                return self.get_path(prev, start_node, end_node), len(distance)
+                return self.get_path(prev, start_node, end_node), visited
 
-            edges = current.neighbours
-            node_time_lookup: Dict[Node, Timestamp] = {}
-            for edge in edges:
-                if edge.departure_time >= arrival:
-                    time_lookup = node_time_lookup.get(edge.dest)
-                    if not time_lookup or time_lookup[0] > edge.arrival_time:
-                        node_time_lookup[edge.dest] = edge.arrival_time, edge
+            node_time_lookup: Dict[int, Tuple[Timestamp, Edge]] = {}
+            for edge in self.edges_from(current, arrival.time):
+                time_lookup = node_time_lookup.get(edge.dest.id)
+                if not time_lookup or time_lookup[0] > edge.arrival_time:
+                    node_time_lookup[edge.dest.id] = edge.arrival_time, edge
 
             for node, (arival_time, edge) in node_time_lookup.items():
+                if stamp[node] != generation:
+                    stamp[node] = generation
+                    distance[node] = inf
+                    visited += 1
                 if distance[node] > arival_time.time:
                     distance[node] = arival_time.time
                     prev[node] = current, edge
-                    queue.enqueue(node, arival_time)
+                    enqueue(edge.dest, arival_time)
 
         return None, None
 
     def dijkstra_py_prority_que(
-        self, start_node: Node, end_node: Node, start_time: Timestamp
+        self, start_node: Node, end_node: Node, start_time: Timestamp, queue: Optional[str] = None
     ) -> Tuple[Optional[List[Edge]], Optional[Number], Optional[Number]]:
-        distance: Dict[Node, Number] = defaultdict(lambda: float("inf"))
-        prev: Dict[Node, Tuple[Node, Edge]] = defaultdict()
-        distance[start_node] = 0
+        """
+        Dijkstra on thread-safe queue.PriorityQueue, the default
+        or "locked" `queue`. Other is kind of search_queue.QUEUES
+        """
+        labels = self.labels
+        distance, prev, stamp = labels.distance, labels.prev, labels.stamp
+        generation = labels.reset(start_node.id)
+        inf = float("inf")
+        visited = 1
 
-        queue: q.PriorityQueue[PriorityItem] = q.PriorityQueue()
-        queue.put_nowait(PriorityItem(start_time, start_node))
-        while not queue.empty():
-            priority_item = queue.get_nowait()
-            current = priority_item.item
-            arrival = priority_item.priority
+        if queue in (None, "locked"):
+            locked_queue: q.PriorityQueue[PriorityItem] = q.PriorityQueue()
+
+            def push(priority: Number, arrival: Timestamp, item: Node) -> None:
+                locked_queue.put_nowait(PriorityItem(priority, arrival, item))
+
+            def pop() -> Tuple[Number, Timestamp, Node]:
+                entry = locked_queue.get_nowait()
+                return entry.priority, entry.arrival, entry.item
+
+            is_empty = locked_queue.empty
+        else:
+            entries = create_queue(queue, monotone=True)
+            push, pop = entries.push, entries.pop
+
+            def is_empty() -> bool:
+                return not entries
+
+        push(start_time.time, start_time, start_node)
+        while not is_empty():
+            _, arrival, current = pop()
             if end_node is current:
                 return (
                     self.get_path(prev, start_node, end_node),
-                    len(distance),
-                    distance[current],
+                    visited,
+                    distance[current.id],
                 )
 
-            edges = current.neighbours
-            for edge in edges:
-                if (
-                    edge.departure_time >= arrival
-                    and distance[edge.dest] > edge.arrival_time.time
-                ):
-                    queue.put_nowait(PriorityItem(edge.arrival_time, edge.dest))
-                    distance[edge.dest] = edge.arrival_time.time
-                    prev[edge.dest] = current, edge
+            for edge in self.edges_from(current, arrival.time):
+                destination = edge.dest.id
+                if stamp[destination] != generation:
+                    stamp[destination] = generation
+                    distance[destination] = inf
+                    visited += 1
+                if distance[destination] > edge.arrival_time.time:
+                    push(edge.arrival_time.time, edge.arrival_time, edge.dest)
+                    distance[destination] = edge.arrival_time.time
+                    prev[destination] = current, edge
 
         return None, None, None
 
     def get_path(
-        self, prev: Dict[Node, Tuple[Edge, Node]], start_node: Node, end_node: Node
+        self, prev: Sequence[Tuple[Node, Edge]], start_node: Node, end_node: Node
     ) -> List[Edge]:
+        """`prev` is indexed by stop id"""
         current_node = end_node
         path = []
         while current_node is not start_node:
-            next_node, edge = prev[current_node]
+            next_node, edge = prev[current_node.id]
             path.append(edge)
             current_node = next_node
         return list(reversed(path))
 
     def dijkstra_heapq(
-        self, start_node: Node, end_node: Node, start_time: Timestamp
+        self, start_node: Node, end_node: Node, start_time: Timestamp, queue: str = "heap"
     ) -> Tuple[Optional[List[Edge]], Optional[Number], Optional[Number]]:
-        distance: Dict[Node, Number] = defaultdict(lambda: float("inf"))
-        prev: Dict[Node, Tuple[Node, Edge]] = defaultdict(lambda: None)
-        distance[start_node] = 0
+        """
+        `queue` is kind of priority queue, see search_queue.QUEUES,
+        arrival times are monotone integer priorities
+        """
+        if self.compact:
+            return self._dijkstra_heapq_compact(start_node, end_node, start_time, queue)
+        setup_start = time.perf_counter()
+        callback = self.stats_callback
+        labels = self.labels
+        distance, prev, stamp = labels.distance, labels.prev, labels.stamp
+        generation = labels.reset(start_node.id)
+        inf = float("inf")
+        visited = 1
+        offsets = self.timetable.offsets_view
+        scanned = relaxed = 0
+        expanded: Optional[Set[int]] = None if callback is None else set()
+        found = False
 
-        queue: List[PriorityItem] = [
-            PriorityItem(start_time.time, start_time, start_node)
-        ]
+        search_start = time.perf_counter()
+        queue = create_queue(queue, monotone=True)
+        push, pop = queue.push, queue.pop
+        push(start_time.time, start_time, start_node)
         while queue:
-            priority_item = heapq.heappop(queue)
-            current = priority_item.item
-            arrival = priority_item.arrival
+            _, arrival, current = pop()
             if end_node is current:
-                return (
-                    self.get_path(prev, start_node, end_node),
-                    len(distance),
-                    distance[current],
-                )
+                found = True
+                break
+            if expanded is not None:
+                expanded.add(current.id)
 
             edges = current.neighbours
-            for edge in edges:
-                if (
-                    edge.departure_time >= arrival
-                    and distance[edge.dest] > edge.arrival_time.time
-                ):
-                    heapq.heappush(
-                        queue,
-                        PriorityItem(
-                            edge.arrival_time.time, edge.arrival_time, edge.dest, edge
-                        ),
-                    )
-                    distance[edge.dest] = edge.arrival_time.time
-                    prev[edge.dest] = current, edge
+            first_row = offsets[current.id]
+            rows = self.departures_from(current.id, arrival.time)
+            scanned += len(rows)
+            for row in rows:
+                edge = edges[row - first_row]
+                destination = edge.dest.id
+                if stamp[destination] != generation:
+                    stamp[destination] = generation
+                    distance[destination] = inf
+                    visited += 1
+                if distance[destination] > edge.arrival_time.time:
+                    relaxed += 1
+                    push(edge.arrival_time.time, edge.arrival_time, edge.dest)
+                    distance[destination] = edge.arrival_time.time
+                    prev[destination] = current, edge
 
-        return None, None, None
+        path_start = time.perf_counter()
+        result = (
+            (self.get_path(prev, start_node, end_node), visited, distance[end_node.id])
+            if found else (None, None, None)
+        )
+        if callback is not None:
+            callback(self._search_stats(
+                "dijkstra_heapq", start_node, end_node, start_time, found, visited,
+                relaxed, len(queue), expanded, scanned, 0,
+                (setup_start, search_start, path_start),
+            ))
+        return result
+
+    def _dijkstra_heapq_compact(
+        self, start_node: Node, end_node: Node, start_time: Timestamp, queue: str = "heap"
+    ) -> Tuple[Optional[List[Edge]], Optional[Number], Optional[Number]]:
+        setup_start = time.perf_counter()
+        callback = self.stats_callback
+        timetable = self.timetable
+        arrival = timetable.arrival_view
+        dest = timetable.dest_view
+        start, end = start_node.id, end_node.id
+        labels = self.labels
+        distance, prev, stamp = labels.distance, labels.prev, labels.stamp
+        generation = labels.reset(start)
+        inf = float("inf")
+        visited = 1
+        scanned = relaxed = 0
+        expanded: Optional[Set[int]] = None if callback is None else set()
+        found = False
+
+        search_start = time.perf_counter()
+        queue = create_queue(queue, monotone=True)
+        push, pop = queue.push, queue.pop
+        push(start_time.time, start_time.time, start)
+        while queue:
+            _, current_arrival, current = pop()
+            if current == end:
+                found = True
+                break
+            if expanded is not None:
+                expanded.add(current)
+
+            connections = self.departures_from(current, current_arrival)
+            scanned += len(connections)
+            for connection in connections:
+                destination = dest[connection]
+                arrival_time = arrival[connection]
+                if stamp[destination] != generation:
+                    stamp[destination] = generation
+                    distance[destination] = inf
+                    visited += 1
+                if distance[destination] > arrival_time:
+                    relaxed += 1
+                    push(arrival_time, arrival_time, destination)
+                    distance[destination] = arrival_time
+                    prev[destination] = current, connection
+
+        path_start = time.perf_counter()
+        result = (
+            (self.get_compact_path(prev, start, end), visited, distance[end])
+            if found else (None, None, None)
+        )
+        if callback is not None:
+            callback(self._search_stats(
+                "dijkstra_heapq", start_node, end_node, start_time, found, visited,
+                relaxed, len(queue), expanded, scanned, 0,
+                (setup_start, search_start, path_start),
+            ))
+        return result
 
     def a_star(
         self,
@@ -297,27 +699,81 @@ class Graph:
         end_node: Node,
         start_time: Timestamp,
         criteria: Union[Literal["time"], Literal["hops"]] = "time",
-        better_heurestic: bool=False
+        better_heurestic: bool=False,
+        landmarks: bool=False,
+        queue: str = "heap",
     ) -> Tuple[Optional[List[Edge]], Optional[Number], Optional[Number]]:
-        distance: Dict[Node, Number] = defaultdict(lambda: float("inf"))
-        prev: Dict[Node, Tuple[Node, Edge]] = defaultdict(lambda: None)
-        distance[start_node] = 0
+        """
+        `queue` is kind of priority queue, see search_queue.QUEUES,
+        except bucket queue, estimates are neither monotone nor integer.
+        With `landmarks` time criteria uses admissible ALT lower bounds
+        (see precompute_landmarks) instead of scaled distance estimate.
+        Start time matters to the search only through the first departure
+        from start_node it can catch, so queries catching the same first
+        departure are answered from self.query_cache, if set
+        """
+        if self.query_cache is None:
+            return self._a_star_search(
+                start_node, end_node, start_time, criteria, better_heurestic, landmarks, queue
+            )
+        key = (
+            start_node.id,
+            end_node.id,
+            criteria,
+            better_heurestic,
+            landmarks,
+            queue,
+            self.timetable.first_departure(start_node.id, start_time.time),
+        )
+        cached = self.query_cache.get(key)
+        if cached is None:
+            path, visited, cost = self._a_star_search(
+                start_node, end_node, start_time, criteria, better_heurestic, landmarks, queue
+            )
+            self.query_cache.put(key, (path, visited, cost, start_time.time))
+            return path, visited, cost
+        path, visited, cost, cached_time = cached
+        if criteria == "time" and cost is not None:
+            cost += cached_time - start_time.time
+        return (None if path is None else list(path)), visited, cost
+
+    def _a_star_search(
+        self,
+        start_node: Node,
+        end_node: Node,
+        start_time: Timestamp,
+        criteria: Union[Literal["time"], Literal["hops"]] = "time",
+        better_heurestic: bool=False,
+        landmarks: bool=False,
+        queue: str = "heap",
+    ) -> Tuple[Optional[List[Edge]], Optional[Number], Optional[Number]]:
+        if self.compact:
+            return self._a_star_compact(
+                start_node, end_node, start_time, criteria, better_heurestic, landmarks, queue
+            )
+        setup_start = time.perf_counter()
+        callback = self.stats_callback
+        labels = self.labels
+        distance, prev, stamp = labels.distance, labels.prev, labels.stamp
+        generation = labels.reset(start_node.id)
+        inf = float("inf")
+        visited = 1
 
         def time_cost_func(source: Node, edge: Edge):
             return edge.arrival_time.time  # to reduce num of opperation
 
         def least_line_change_cost_func(source: Node, edge: Edge):
             hop_penalty = self.hop_penalty
-            previous = prev[source]
+            previous = prev[source.id]
             if previous is not None:
                 prev_edge = previous[1]
                 prev_line = prev_edge.line
                 if prev_line == edge.line:
                     hop_penalty = 0
-            return distance[source] + hop_penalty
+            return distance[source.id] + hop_penalty
 
         def cost_estimate_func(edge: Edge):
-            return self.cost_estimation_scale * end_node.distance(edge.dest)
+            return target_estimates[edge.dest.id]
 
         def better_cost_estimate_func(edge: Edge):
             return cost_estimate_func(edge) - self.hub_bonus*(len(edge.dest.neighbours))
@@ -326,38 +782,615 @@ class Graph:
             time_cost_func if criteria == "time" else least_line_change_cost_func
         )
 
-        cost_estimate__reference = (
-            cost_estimate_func if not better_heurestic else better_cost_estimate_func
-        )
+        def landmark_cost_estimate_func(edge: Edge):
+            return lower_bounds[edge.dest.id]
+
+        # distance estimate is computed only when it is the heuristic in use
+        if landmarks and criteria == "time":
+            lower_bounds = self.landmark_bounds(end_node)
+            cost_estimate__reference = landmark_cost_estimate_func
+        else:
+            target_estimates = (
+                self.cost_estimation_scale * self.distances_to(end_node)
+            ).tolist()
+            cost_estimate__reference = (
+                cost_estimate_func if not better_heurestic else better_cost_estimate_func
+            )
 
-        queue: List[PriorityItem] = [PriorityItem(0, start_time, start_node)]
+        offsets = self.timetable.offsets_view
+        scanned = relaxed = 0
+        expanded: Optional[Set[int]] = None if callback is None else set()
+        found = False
+
+        search_start = time.perf_counter()
+        queue = create_queue(queue)
+        push, pop = queue.push, queue.pop
+        push(0, start_time, start_node)
         while queue:
-            priority_item = heapq.heappop(queue)
-            current = priority_item.item
-            arrival = priority_item.arrival
+            _, arrival, current = pop()
             if end_node is current:
-                return (
-                    self.get_path(prev, start_node, end_node),
-                    len(distance),
-                    distance[current] - (start_time.time if criteria=='time' else 0),
-                )
+                found = True
+                break
+            if expanded is not None:
+                expanded.add(current.id)
 
             edges = current.neighbours
-            for edge in edges:
+            first_row = offsets[current.id]
+            rows = self.departures_from(current.id, arrival.time)
+            scanned += len(rows)
+            for row in rows:
+                edge = edges[row - first_row]
                 destination_cost = cost_func_reference(current, edge)
-                if (
-                    edge.departure_time >= arrival
-                    and distance[edge.dest] > destination_cost
-                ):
-                    distance[edge.dest] = destination_cost
+                destination = edge.dest.id
+                if stamp[destination] != generation:
+                    stamp[destination] = generation
+                    distance[destination] = inf
+                    visited += 1
+                if distance[destination] > destination_cost:
+                    relaxed += 1
+                    distance[destination] = destination_cost
                     estimated_cost = destination_cost + cost_estimate__reference(edge)
-                    heapq.heappush(
-                        queue,
-                        PriorityItem(estimated_cost, edge.arrival_time, edge.dest),
+                    push(estimated_cost, edge.arrival_time, edge.dest)
+                    prev[destination] = current, edge
+
+        path_start = time.perf_counter()
+        result = (
+            (
+                self.get_path(prev, start_node, end_node),
+                visited,
+                distance[end_node.id] - (start_time.time if criteria=='time' else 0),
+            )
+            if found else (None, None, None)
+        )
+        if callback is not None:
+            callback(self._search_stats(
+                "a_star", start_node, end_node, start_time, found, visited,
+                relaxed, len(queue), expanded, scanned, relaxed,
+                (setup_start, search_start, path_start),
+            ))
+        return result
+
+    def _a_star_compact(
+        self,
+        start_node: Node,
+        end_node: Node,
+        start_time: Timestamp,
+        criteria: Union[Literal["time"], Literal["hops"]] = "time",
+        better_heurestic: bool=False,
+        landmarks: bool=False,
+        queue: str = "heap",
+    ) -> Tuple[Optional[List[Edge]], Optional[Number], Optional[Number]]:
+        """a_star iterating timetable rows instead of Edge objects"""
+        setup_start = time.perf_counter()
+        callback = self.stats_callback
+        timetable = self.timetable
+        arrival = timetable.arrival_view
+        dest = timetable.dest_view
+        line = timetable.line_view
+        start, end = start_node.id, end_node.id
+        labels = self.labels
+        distance, prev, stamp = labels.distance, labels.prev, labels.stamp
+        generation = labels.reset(start)
+        inf = float("inf")
+        visited = 1
+        hops = criteria == "hops"
+
+        def cost_estimate_func(stop: int):
+            return target_estimates[stop]
+
+        def better_cost_estimate_func(stop: int):
+            return cost_estimate_func(stop) - self.hub_bonus*(timetable.out_degree(stop))
+
+        # distance estimate is computed only when it is the heuristic in use
+        if landmarks and not hops:
+            cost_estimate__reference = self.landmark_bounds(end_node).__getitem__
+        else:
+            target_estimates = (
+                self.cost_estimation_scale * self.distances_to(end_node)
+            ).tolist()
+            cost_estimate__reference = (
+                cost_estimate_func if not better_heurestic else better_cost_estimate_func
+            )
+
+        scanned = relaxed = 0
+        expanded: Optional[Set[int]] = None if callback is None else set()
+        found = False
+
+        search_start = time.perf_counter()
+        queue = create_queue(queue)
+        push, pop = queue.push, queue.pop
+        push(0, start_time.time, start)
+        while queue:
+            _, current_arrival, current = pop()
+            if current == end:
+                found = True
+                break
+            if expanded is not None:
+                expanded.add(current)
+
+            if hops:
+                current_cost = distance[current]
+                previous = prev[current]
+                current_line = line[previous[1]] if previous is not None else None
+            connections = self.departures_from(current, current_arrival)
+            scanned += len(connections)
+            for connection in connections:
+                if hops:
+                    destination_cost = current_cost + (
+                        0 if line[connection] == current_line else self.hop_penalty
                     )
-                    prev[edge.dest] = current, edge
+                else:
+                    destination_cost = arrival[connection]
+                destination = dest[connection]
+                if stamp[destination] != generation:
+                    stamp[destination] = generation
+                    distance[destination] = inf
+                    visited += 1
+                if distance[destination] > destination_cost:
+                    relaxed += 1
+                    distance[destination] = destination_cost
+                    estimated_cost = destination_cost + cost_estimate__reference(destination)
+                    push(estimated_cost, arrival[connection], destination)
+                    prev[destination] = current, connection
 
-        return None, None, None
+        path_start = time.perf_counter()
+        result = (
+            (
+                self.get_compact_path(prev, start, end),
+                visited,
+                distance[end] - (start_time.time if criteria=='time' else 0),
+            )
+            if found else (None, None, None)
+        )
+        if callback is not None:
+            callback(self._search_stats(
+                "a_star", start_node, end_node, start_time, found, visited,
+                relaxed, len(queue), expanded, scanned, relaxed,
+                (setup_start, search_start, path_start),
+            ))
+        return result
+
+    def _search_stats(
+        self,
+        algorithm: str,
+        start_node: Node,
+        end_node: Node,
+        start_time: Timestamp,
+        found: bool,
+        visited: int,
+        relaxed: int,
+        queued: int,
+        expanded: Set[int],
+        scanned: int,
+        heuristic_calls: int,
+        phase_starts: Tuple[float, float, float],
+    ) -> SearchStats:
+        """
+        Every relaxation pushes once, so pushes and pops follow from
+        `relaxed` and `queued` entries left, stale pops are pops that
+        neither expanded new stop nor reached end_node
+        """
+        setup_start, search_start, path_start = phase_starts
+        pushes = relaxed + 1
+        pops = pushes - queued
+        return SearchStats(
+            algorithm,
+            start_node.id,
+            end_node.id,
+            start_time.time,
+            found=found,
+            visited=visited,
+            pushes=pushes,
+            pops=pops,
+            stale_pops=pops - len(expanded) - found,
+            edges_scanned=scanned,
+            edges_relaxed=relaxed,
+            heuristic_calls=heuristic_calls,
+            phases={
+                "setup": search_start - setup_start,
+                "search": path_start - search_start,
+                "path": time.perf_counter() - path_start,
+            },
+        )
+
+    def _scan_stats(
+        self,
+        algorithm: str,
+        start: int,
+        end: int,
+        start_time: Timestamp,
+        found: bool,
+        visited: int,
+        scanned: int,
+        relaxed: int,
+        phase_starts: Tuple[float, float, float],
+    ) -> SearchStats:
+        """Connection scans use no queue, so they push and pop nothing"""
+        setup_start, search_start, path_start = phase_starts
+        return SearchStats(
+            algorithm,
+            start,
+            end,
+            start_time.time,
+            found=found,
+            visited=visited,
+            edges_scanned=scanned,
+            edges_relaxed=relaxed,
+            phases={
+                "setup": search_start - setup_start,
+                "search": path_start - search_start,
+                "path": time.perf_counter() - path_start,
+            },
+        )
+
+    def connection_scan(
+        self, start_node: Node, end_node: Node, start_time: Timestamp
+    ) -> Tuple[Optional[List[Edge]], Optional[Number], Optional[Number]]:
+        """
+        Earliest arrival Connection Scan Algorithm, same result as
+        a_star with time criteria. Scans all connections ordered by
+        departure once, stops when departures get later than
+        the best known arrival at end_node
+        """
+        setup_start = time.perf_counter()
+        callback = self.stats_callback
+        timetable = self.timetable
+        timetable.build_scan_arrays()
+        rows = timetable.scan_rows_view
+        departure = timetable.scan_departure_view
+        arrival = timetable.scan_arrival_view
+        source = timetable.scan_start_view
+        dest = timetable.scan_dest_view
+        start, end = start_node.id, end_node.id
+        inf = float("inf")
+        earliest: List[Number] = [inf] * timetable.stop_count
+        earliest[start] = start_time.time
+        prev: Dict[int, Tuple[int, int]] = {}
+        relaxed = 0
+
+        search_start = time.perf_counter()
+        first = bisect_left(departure, start_time.time)
+        stop = timetable.connection_count
+        for connection in range(first, stop):
+            connection_departure = departure[connection]
+            if connection_departure >= earliest[end]:
+                stop = connection
+                break
+            if earliest[source[connection]] > connection_departure:
+                continue
+            destination = dest[connection]
+            if arrival[connection] < earliest[destination]:
+                relaxed += 1
+                earliest[destination] = arrival[connection]
+                prev[destination] = source[connection], rows[connection]
+
+        path_start = time.perf_counter()
+        found = earliest[end] != inf
+        result = None, None, None
+        if found:
+            result = (
+                self.get_compact_path(prev, start, end),
+                len(prev) + 1,
+                earliest[end] - start_time.time,
+            )
+        if callback is not None:
+            callback(self._scan_stats(
+                "connection_scan", start, end, start_time, found, len(prev) + 1,
+                stop - first, relaxed, (setup_start, search_start, path_start),
+            ))
+        return result
+
+    def latest_departure(
+        self, start_node: Node, end_node: Node, arrive_by: Timestamp, queue: str = "heap"
+    ) -> Tuple[Optional[List[Edge]], Optional[Number], Optional[Number]]:
+        """
+        Latest departure from start_node still reaching end_node by
+        `arrive_by`, answered by one backward search over connections
+        ordered by arrival instead of forward searches over start times.
+        Label of stop is the latest time one can leave it, cost is
+        seconds from the departure to `arrive_by`. Negated departures
+        are monotone priorities, any search_queue.QUEUES kind fits
+        """
+        setup_start = time.perf_counter()
+        callback = self.stats_callback
+        timetable = self.timetable
+        timetable.build_reverse_index()
+        rows = timetable.in_best_row_view
+        departure = timetable.in_best_departure_view
+        source = timetable.in_start_view
+        start, end = start_node.id, end_node.id
+        labels = self.labels
+        latest, prev, stamp = labels.distance, labels.prev, labels.stamp
+        generation = labels.reset(end)
+        latest[end] = arrive_by.time
+        inf = float("inf")
+        visited = 1
+        scanned = relaxed = 0
+        expanded: Optional[Set[int]] = None if callback is None else set()
+        found = False
+
+        search_start = time.perf_counter()
+        queue = create_queue(queue, monotone=True)
+        push, pop = queue.push, queue.pop
+        push(-arrive_by.time, arrive_by.time, end)
+        while queue:
+            _, current_time, current = pop()
+            if current == start:
+                found = True
+                break
+            if current_time < latest[current]:
+                continue
+            if expanded is not None:
+                expanded.add(current)
+
+            positions = timetable.latest_departures(current, current_time)
+            scanned += len(positions)
+            for position in positions:
+                origin = source[position]
+                departure_time = departure[position]
+                if stamp[origin] != generation:
+                    stamp[origin] = generation
+                    latest[origin] = -inf
+                    visited += 1
+                if latest[origin] < departure_time:
+                    relaxed += 1
+                    latest[origin] = departure_time
+                    prev[origin] = current, rows[position]
+                    push(-departure_time, departure_time, origin)
+
+        path_start = time.perf_counter()
+        result = None, None, None
+        if found:
+            # prev leads from start towards end here
+            path = []
+            current = start
+            while current != end:
+                current, connection = prev[current]
+                path.append(self.get_edge(connection))
+            result = path, visited, arrive_by.time - latest[start]
+        if callback is not None:
+            callback(self._search_stats(
+                "latest_departure", start_node, end_node, arrive_by, found, visited,
+                relaxed, len(queue), expanded, scanned, 0,
+                (setup_start, search_start, path_start),
+            ))
+        return result
+
+    def profile_query(
+        self,
+        start_node: Node,
+        end_node: Node,
+        window_start: Timestamp,
+        window_end: Timestamp,
+    ) -> List[List[Edge]]:
+        """
+        Every non-dominated journey departing from start_node within
+        the window (no other journey leaves later and arrives earlier
+        or at the same time), ordered by departure.
+        Profile Connection Scan, connections are scanned once backwards
+        and each stop keeps pareto (departure, arrival at end_node) labels
+        """
+        timetable = self.timetable
+        timetable.build_scan_arrays()
+        rows = timetable.scan_rows_view
+        departure = timetable.scan_departure_view
+        arrival = timetable.scan_arrival_view
+        source = timetable.scan_start_view
+        dest = timetable.scan_dest_view
+        start, end = start_node.id, end_node.id
+        if start == end:
+            return []
+
+        inf = float("inf")
+        # labels per stop in order of decreasing departure and arrival,
+        # departures are negated so bisect finds the latest usable label
+        negated_departures: Dict[int, List[int]] = defaultdict(list)
+        arrivals: Dict[int, List[int]] = defaultdict(list)
+        connections: Dict[int, List[int]] = defaultdict(list)
+
+        def earliest_arrival(stop: int, time: int) -> Tuple[Number, int]:
+            stop_departures = negated_departures.get(stop)
+            if not stop_departures:
+                return inf, -1
+            position = bisect_right(stop_departures, -time) - 1
+            if position < 0:
+                return inf, -1
+            return arrivals[stop][position], connections[stop][position]
+
+        def add_label(
+            stop_departures: List[int],
+            stop_arrivals: List[Number],
+            stop_connections: List[int],
+            connection: int,
+            arrival_at_end: Number,
+        ) -> None:
+            """Keeps labels pareto, scanned departures never increase"""
+            if stop_arrivals and stop_arrivals[-1] <= arrival_at_end:
+                return
+            if stop_arrivals and stop_departures[-1] == -departure[connection]:
+                stop_arrivals[-1] = arrival_at_end
+                stop_connections[-1] = connection
+            elif arrival_at_end != inf:
+                stop_departures.append(-departure[connection])
+                stop_arrivals.append(arrival_at_end)
+                stop_connections.append(connection)
+
+        # journeys boarding at start inside the window, kept apart from
+        # labels of start, which later transfers through start may use
+        journey_departures: List[int] = []
+        journey_arrivals: List[Number] = []
+        journey_connections: List[int] = []
+        # no cutoff after the window, a journey leaving start inside it
+        # may still need any later connection, e.g. when everything
+        # departing after the window reaches end_node earlier
+        first = bisect_left(departure, window_start.time)
+        for connection in range(timetable.connection_count - 1, first - 1, -1):
+            stop = source[connection]
+            if stop == end:
+                continue
+            destination = dest[connection]
+            if destination == end:
+                arrival_at_end = arrival[connection]
+            else:
+                arrival_at_end, _ = earliest_arrival(destination, arrival[connection])
+            add_label(
+                negated_departures[stop], arrivals[stop], connections[stop],
+                connection, arrival_at_end,
+            )
+            # departures after the window must not dominate those inside it
+            if stop == start and departure[connection] <= window_end.time:
+                add_label(
+                    journey_departures, journey_arrivals, journey_connections,
+                    connection, arrival_at_end,
+                )
+
+        journeys = []
+        for connection in reversed(journey_connections):
+            path = [rows[connection]]
+            stop = dest[connection]
+            while stop != end:
+                _, connection = earliest_arrival(stop, arrival[connection])
+                path.append(rows[connection])
+                stop = dest[connection]
+            journeys.append([self.get_edge(row) for row in path])
+        return journeys
+
+    def earliest_arrival_tree(
+        self,
+        start_node: Node,
+        start_time: Timestamp,
+        max_duration: Optional[int] = None,
+        targets: Optional[List[Node]] = None,
+    ) -> EarliestArrivalTree:
+        """
+        One-to-all Connection Scan, labels of all stops reachable
+        within `max_duration` seconds (whole day when None).
+        With `targets` given scan stops once all of them are settled,
+        labels of other stops may then be incomplete.
+        Its SearchStats have end -1 and are found once all targets are reached
+        """
+        setup_start = time.perf_counter()
+        callback = self.stats_callback
+        timetable = self.timetable
+        timetable.build_scan_arrays()
+        rows = timetable.scan_rows_view
+        departure = timetable.scan_departure_view
+        arrival = timetable.scan_arrival_view
+        source = timetable.scan_start_view
+        dest = timetable.scan_dest_view
+        unreachable = EarliestArrivalTree.UNREACHABLE
+        start = start_node.id
+        horizon = unreachable - 1 if max_duration is None else start_time.time + max_duration
+        earliest = [unreachable] * timetable.stop_count
+        predecessor = [-1] * timetable.stop_count
+        earliest[start] = start_time.time
+        target_ids = {node.id for node in targets} if targets else set()
+        settled_at = max(earliest[target] for target in target_ids) if target_ids else unreachable
+        relaxed = 0
+
+        search_start = time.perf_counter()
+        first = bisect_left(departure, start_time.time)
+        last = bisect_right(departure, horizon)
+        for connection in range(first, last):
+            if departure[connection] >= settled_at:
+                last = connection
+                break
+            if earliest[source[connection]] > departure[connection]:
+                continue
+            destination = dest[connection]
+            connection_arrival = arrival[connection]
+            if connection_arrival < earliest[destination] and connection_arrival <= horizon:
+                relaxed += 1
+                earliest[destination] = connection_arrival
+                predecessor[destination] = rows[connection]
+                if destination in target_ids:
+                    settled_at = max(earliest[target] for target in target_ids)
+
+        path_start = time.perf_counter()
+        predecessor_rows = np.array(predecessor, dtype=np.int64)
+        reached = predecessor_rows >= 0
+        parent = np.full(timetable.stop_count, -1, dtype=np.int64)
+        parent[reached] = (
+            np.searchsorted(timetable.offsets, predecessor_rows[reached], side="right") - 1
+        )
+        tree = EarliestArrivalTree(
+            start,
+            start_time.time,
+            np.array(earliest, dtype=TIME_DTYPE),
+            predecessor_rows,
+            parent,
+        )
+        if callback is not None:
+            callback(self._scan_stats(
+                "earliest_arrival_tree", start, -1, start_time,
+                not target_ids or settled_at != unreachable,
+                int(reached.sum()) + 1, last - first, relaxed,
+                (setup_start, search_start, path_start),
+            ))
+        return tree
+
+    def one_to_many(
+        self, start_node: Node, start_time: Timestamp, end_nodes: List[Node]
+    ) -> Dict[Node, Optional[List[Edge]]]:
+        """Earliest arrival paths to all end_nodes from a single scan"""
+        tree = self.earliest_arrival_tree(start_node, start_time, targets=end_nodes)
+        return self.tree_paths(tree, end_nodes)
+
+    def tree_paths(
+        self, tree: EarliestArrivalTree, end_nodes: List[Node]
+    ) -> Dict[Node, Optional[List[Edge]]]:
+        """
+        Paths from tree start to many targets, shared prefixes are
+        walked once. Unreached targets map to None
+        """
+        predecessor = tree.predecessor.tolist()
+        parent = tree.parent.tolist()
+        edges: Dict[int, Edge] = {}
+        stop_paths: Dict[int, List[Edge]] = {tree.start: []}
+        paths: Dict[Node, Optional[List[Edge]]] = {}
+        for end_node in end_nodes:
+            if end_node.id != tree.start and predecessor[end_node.id] < 0:
+                paths[end_node] = None
+                continue
+            branch = []
+            stop = end_node.id
+            while stop not in stop_paths:
+                branch.append(stop)
+                stop = parent[stop]
+            for stop_on_branch in reversed(branch):
+                row = predecessor[stop_on_branch]
+                if row not in edges:
+                    edges[row] = self.get_edge(row)
+                stop_paths[stop_on_branch] = stop_paths[parent[stop_on_branch]] + [edges[row]]
+            paths[end_node] = stop_paths[end_node.id]
+        return paths
+
+    def raptor(
+        self,
+        start_node: Node,
+        end_node: Node,
+        start_time: Timestamp,
+        max_transfers: int = 5,
+    ) -> List[Tuple[List[Edge], int, Number]]:
+        """
+        Pareto optimal journeys by arrival time and number of transfers
+        from a single RAPTOR run, as (path, transfers, cost) tuples
+        ordered from the fewest transfers to the fastest journey.
+        Cost is travel time as in a_star with time criteria
+        """
+        if self.raptor_index is None:
+            self.raptor_index = RaptorIndex(self.timetable)
+        journeys = self.raptor_index.query(
+            start_node.id, end_node.id, start_time.time, max_transfers + 1
+        )
+        return [
+            (
+                [self.get_edge(row) for row in rows],
+                max(trips - 1, 0),
+                arrival - start_time.time,
+            )
+            for arrival, trips, rows in journeys
+        ]
 
 
 if __name__ == "__main__":
@@ -1,5 +1,6 @@
 import random
 from typing import List, Tuple
+import numpy as np
 from graph import *
 
 def random_time():
@@ -18,14 +19,19 @@ def get_test_data_between_distance(
         quantity: int,
         min_d=0,
         max_d=10,
+        max_tries: Optional[int] = None,
     ) -> List[Tuple[Node, Node, Timestamp]]:
+    """With `max_tries` fewer pairs are returned when the band is sparse"""
     nodes = list(graph.graph.values())
     node_pairs = []
-    while len(node_pairs) < quantity:
-        src, dest = random.choices(nodes, k=2)
-        distance = src.distance(dest)
-        if min_d <= distance <= max_d:
-            node_pairs.append((src, dest))
+    tries = 0
+    while len(node_pairs) < quantity and (max_tries is None or tries < max_tries):
+        tries += 1
+        src = random.choice(nodes)
+        distances = graph.distances_to(src)
+        candidates = np.flatnonzero((min_d <= distances) & (distances <= max_d))
+        if len(candidates):
+            node_pairs.append((src, graph.nodes[random.choice(candidates.tolist())]))
 
     return [ (n1, n2, Timestamp.create_timestamp(random_time())) for n1, n2  in node_pairs ]
 
@@ -77,3 +83,5 @@ if __name__ == "__main__":
         print(f"{i+1}. {n1.stop_name} -> {n2.stop_name} @ {t.time_str}")
 
     print(graph_benchmark_silent(graph.a_star, test_data, criteria='hops'))
+    graph_benchmark(graph.a_star, test_data)
+    graph_benchmark(graph.connection_scan, test_data)
@@ -0,0 +1,88 @@
+"""
+    Exact multi-stop tour by bitmask dynamic programming
+    Based on: Held, Karp "A Dynamic Programming Approach to Sequencing Problems"
+"""
+
+from numbers import Number
+from typing import Dict, List, Tuple
+from graph import Edge, Node, Timestamp
+from tabu import Tabu
+
+
+class HeldKarp(Tabu):
+    """
+    Optimal tour for time criterion, drop-in for Tabu.tabu_search_v2.
+    Timetable is FIFO, arriving earlier at a stop never delays the rest
+    of the tour, so only the earliest arrival of every
+    (visited stops, last stop) state is kept.
+    Note:
+        - O(2^n * n^2) legs, n is number of intermediate stops
+        - Legs come from Tabu.get_partial_solution and share its leg cache
+    """
+
+    MAX_STOPS = 10
+
+    def tabu_search_v2(self, start_node: Node, node_list: List[Node], start: Timestamp) -> Tuple[List[Edge], Tuple[Node, ...], Number]:
+        if self.criteria != 'time':
+            raise ValueError("Held-Karp is exact only for time criterion")
+        self.tour_nodes = [start_node]+node_list
+        count = len(node_list)
+        full = (1 << count) - 1
+        # (visited mask, last stop) -> (arrival, previous last stop, leg)
+        states: Dict[Tuple[int, int], Tuple[Timestamp, int, List[Edge]]] = {}
+        for nxt, node in enumerate(node_list):
+            self._relax(states, (1 << nxt, nxt), start_node, node, start, -1)
+        for mask in range(1, full):
+            for last in range(count):
+                state = states.get((mask, last))
+                if state is None:
+                    continue
+                for nxt in range(count):
+                    if not mask & 1 << nxt:
+                        self._relax(states, (mask | 1 << nxt, nxt), node_list[last], node_list[nxt], state[0], last)
+
+        best_arrival, best_last, best_leg = None, -1, None
+        if count == 0:
+            best_leg, _ = self.get_partial_solution(start_node, start_node, start)
+            best_arrival = best_leg[-1].arrival_time if best_leg else start
+        for last in range(count):
+            state = states.get((full, last))
+            if state is None:
+                continue
+            leg, _ = self.get_partial_solution(node_list[last], start_node, state[0])
+            if leg is None:
+                continue
+            arrival = leg[-1].arrival_time if leg else state[0]
+            if best_arrival is None or arrival < best_arrival:
+                best_arrival, best_last, best_leg = arrival, last, leg
+        if best_leg is None:
+            return None, tuple([start_node]+node_list+[start_node]), float('inf')
+
+        solution = [start_node]
+        legs = [best_leg]
+        mask, last = full, best_last
+        while last != -1:
+            solution.append(node_list[last])
+            _, previous, leg = states[mask, last]
+            legs.append(leg)
+            mask, last = mask & ~(1 << last), previous
+        solution.append(start_node)
+        path = [edge for leg in reversed(legs) for edge in leg]
+        return path, tuple(reversed(solution)), best_arrival.time - start.time
+
+    def _relax(
+        self,
+        states: Dict[Tuple[int, int], Tuple[Timestamp, int, List[Edge]]],
+        key: Tuple[int, int],
+        from_node: Node,
+        to_node: Node,
+        from_time: Timestamp,
+        last: int,
+    ) -> None:
+        leg, _ = self.get_partial_solution(from_node, to_node, from_time)
+        if leg is None:
+            return
+        arrival = leg[-1].arrival_time if leg else from_time
+        state = states.get(key)
+        if state is None or arrival < state[0]:
+            states[key] = (arrival, last, leg)
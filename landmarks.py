@@ -0,0 +1,131 @@
+"""
+    Landmark (ALT) lower bounds of travel time for A*
+    Based on: Goldberg, Harrelson "Computing the Shortest Path: A* Search Meets Graph Theory"
+"""
+
+from dataclasses import dataclass
+import heapq
+import os
+from typing import List, Tuple
+import numpy as np
+from timetable import Timetable
+
+
+def minimum_duration_graph(timetable: Timetable) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Time-independent graph with the shortest ride between two stops as weight,
+    waiting is ignored so its distances never exceed real travel times.
+    Returns (offsets, dest, weight) in CSR layout
+    """
+    start = timetable.start_stops()
+    duration = (timetable.arrival - timetable.departure).astype(np.int64)
+    keys = start.astype(np.int64) * timetable.stop_count + timetable.dest
+    order = np.lexsort((duration, keys))
+    keys = keys[order]
+    first = np.flatnonzero(np.diff(keys, prepend=-1)) if len(keys) else np.zeros(0, int)
+    unique_keys = keys[first]
+    weight = duration[order][first]
+    source = unique_keys // timetable.stop_count
+    offsets = np.zeros(timetable.stop_count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(source, minlength=timetable.stop_count), out=offsets[1:])
+    return offsets, unique_keys % timetable.stop_count, weight
+
+
+def reverse_graph(
+    offsets: np.ndarray, dest: np.ndarray, weight: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    source = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+    order = np.argsort(dest, kind="stable")
+    reverse_offsets = np.zeros_like(offsets)
+    np.cumsum(np.bincount(dest, minlength=len(offsets) - 1), out=reverse_offsets[1:])
+    return reverse_offsets, source[order], weight[order]
+
+
+def static_dijkstra(
+    offsets: List[int], dest: List[int], weight: List[int], start: int
+) -> np.ndarray:
+    distance = [float("inf")] * (len(offsets) - 1)
+    distance[start] = 0
+    queue = [(0, start)]
+    while queue:
+        current_distance, current = heapq.heappop(queue)
+        if current_distance > distance[current]:
+            continue
+        for edge in range(offsets[current], offsets[current + 1]):
+            candidate = current_distance + weight[edge]
+            if candidate < distance[dest[edge]]:
+                distance[dest[edge]] = candidate
+                heapq.heappush(queue, (candidate, dest[edge]))
+    return np.array(distance)
+
+
+@dataclass
+class Landmarks:
+    """
+    to_landmark[i, v] and from_landmark[i, v] are minimum-duration
+    distances from stop v to landmark i and from landmark i to v
+    """
+
+    stops: np.ndarray
+    to_landmark: np.ndarray
+    from_landmark: np.ndarray
+
+    @classmethod
+    def compute(cls, timetable: Timetable, count: int = 16) -> "Landmarks":
+        """
+        Farthest landmark selection, the first landmark is the stop
+        farthest from the centre, next ones maximise the distance
+        to landmarks chosen so far
+        """
+        forward = [array.tolist() for array in minimum_duration_graph(timetable)]
+        backward = [
+            array.tolist() for array in reverse_graph(*minimum_duration_graph(timetable))
+        ]
+        latitude, longitude = timetable.latitude, timetable.longitude
+        first = int(
+            np.argmax((latitude - latitude.mean()) ** 2 + (longitude - longitude.mean()) ** 2)
+        )
+        stops, to_landmark, from_landmark = [], [], []
+        closest = np.full(timetable.stop_count, np.inf)
+        candidate = first
+        for _ in range(min(count, timetable.stop_count)):
+            stops.append(candidate)
+            from_landmark.append(static_dijkstra(*forward, candidate))
+            to_landmark.append(static_dijkstra(*backward, candidate))
+            spread = np.minimum(from_landmark[-1], to_landmark[-1])
+            closest = np.minimum(closest, np.where(np.isfinite(spread), spread, -1))
+            closest[stops] = -1
+            candidate = int(np.argmax(closest))
+            if closest[candidate] <= 0:
+                break
+        return cls(np.array(stops), np.array(to_landmark), np.array(from_landmark))
+
+    def save(self, path: str) -> None:
+        """Written to temporary file first, readers never see partial file"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as file:
+            np.savez(
+                file,
+                stops=self.stops,
+                to_landmark=self.to_landmark,
+                from_landmark=self.from_landmark,
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "Landmarks":
+        with np.load(path) as data:
+            return cls(data["stops"], data["to_landmark"], data["from_landmark"])
+
+    def lower_bounds(self, target: int) -> List[float]:
+        """
+        Admissible estimate of travel time from every stop to `target`
+        by triangle inequality, inf when target is unreachable
+        """
+        with np.errstate(invalid="ignore"):
+            to_bound = self.to_landmark - self.to_landmark[:, target, None]
+            from_bound = self.from_landmark[:, target, None] - self.from_landmark
+        # inf - inf means landmark tells nothing about the pair
+        bounds = np.fmax(np.nan_to_num(to_bound, nan=0.0, neginf=0.0, posinf=np.inf),
+                         np.nan_to_num(from_bound, nan=0.0, neginf=0.0, posinf=np.inf))
+        return np.maximum(bounds.max(axis=0), 0).tolist()
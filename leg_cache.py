@@ -0,0 +1,85 @@
+"""
+    Bounded cache of tour legs shared between departure times
+"""
+
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from numbers import Number
+from typing import TYPE_CHECKING, Dict, Hashable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from graph import Edge
+
+
+Leg = Tuple[Optional[List["Edge"]], Optional[Number]]
+
+
+class LegCache:
+    """
+    LRU cache of legs between two stops. Each entry covers departures
+    in interval (low, high]: with no connection leaving the stop in
+    (low, t) every search started in it is the same search as from t,
+    and by FIFO an earliest-arrival journey departing at d is still
+    optimal for every start up to d.
+    Note:
+        - Lookup O(log k), k is number of intervals cached for the pair
+        - Stored cost is the one computed for the original departure,
+          time dependent costs have to be recomputed from the path
+    """
+
+    def __init__(self, max_entries: int = 100_000) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[Hashable, int], Tuple[int, Leg]]" = OrderedDict()
+        self._lows: Dict[Hashable, List[int]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, time: int) -> Optional[Leg]:
+        """Cached leg valid for departure at `time`"""
+        lows = self._lows.get(key)
+        if lows:
+            position = bisect_left(lows, time) - 1
+            if position >= 0:
+                entry_key = (key, lows[position])
+                high, leg = self._entries[entry_key]
+                if time <= high:
+                    self._entries.move_to_end(entry_key)
+                    self.hits += 1
+                    return leg
+        self.misses += 1
+        return None
+
+    def put(self, key: Hashable, low: int, high: int, leg: Leg) -> None:
+        entry_key = (key, low)
+        previous = self._entries.get(entry_key)
+        if previous is not None:
+            high = max(high, previous[0])
+        else:
+            insort(self._lows.setdefault(key, []), low)
+        self._entries[entry_key] = (high, leg)
+        self._entries.move_to_end(entry_key)
+        while len(self._entries) > self.max_entries:
+            (evicted_key, evicted_low), _ = self._entries.popitem(last=False)
+            lows = self._lows[evicted_key]
+            lows.remove(evicted_low)
+            if not lows:
+                del self._lows[evicted_key]
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._lows.clear()
+
+    def stats(self) -> Dict[str, Number]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,78 @@
+"""
+    Bounded cache of Graph.a_star results
+"""
+
+from collections import OrderedDict
+from numbers import Number
+from typing import TYPE_CHECKING, Dict, Hashable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from graph import Edge
+
+
+# path, visited, cost, start time of the search
+QueryResult = Tuple[Optional[List["Edge"]], Optional[Number], Optional[Number], int]
+
+
+class QueryCache:
+    """
+    LRU cache of query results within memory budget. Key of an entry
+    has to identify the search exactly, see Graph.a_star.
+    Note:
+        - Entry size is estimated from number of edges in its path,
+          edges are shared with the returned paths
+        - Entry larger than the whole budget is not cached
+    """
+
+    ENTRY_BYTES = 400
+    EDGE_BYTES = 350
+
+    def __init__(self, max_bytes: int = 64 * 2**20) -> None:
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries: "OrderedDict[Hashable, Tuple[int, QueryResult]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[QueryResult]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: Hashable, result: QueryResult) -> None:
+        path = result[0]
+        size = self.ENTRY_BYTES + self.EDGE_BYTES * (len(path) if path else 0)
+        if size > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.bytes -= previous[0]
+        self._entries[key] = (size, result)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            _, (evicted_size, _) = self._entries.popitem(last=False)
+            self.bytes -= evicted_size
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.bytes = 0
+
+    def stats(self) -> Dict[str, Number]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
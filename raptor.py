@@ -0,0 +1,237 @@
+"""
+    Round-based public transit routing (RAPTOR)
+    Based on: Delling, Pajor, Werneck "Round-Based Public Transit Routing"
+"""
+
+from bisect import bisect_left
+from collections import defaultdict
+from dataclasses import dataclass
+from numbers import Number
+from typing import Dict, List, Tuple
+import numpy as np
+import pandas as pd
+from timetable import Timetable
+
+
+@dataclass
+class Trip:
+    """
+    Single vehicle run, departures[j] leaves route stop j
+    and arrivals[j] reaches route stop j+1 by timetable row rows[j]
+    """
+
+    departures: List[int]
+    arrivals: List[int]
+    rows: List[int]
+
+
+@dataclass
+class Route:
+    """Trips with the same stop sequence, sorted and never overtaking"""
+
+    stops: List[int]
+    trips: List[Trip]
+    stop_departures: List[List[int]]
+
+
+def infer_trips(timetable: Timetable) -> List[List[int]]:
+    """
+    Timetable has no trip ids, a row is continued by the row of the same
+    line and company leaving its destination at its arrival time.
+    Returns trips as lists of rows in travel order
+    """
+    count = timetable.connection_count
+    start = timetable.start_stops()
+    rows = pd.DataFrame(
+        {
+            "stop": start,
+            "time": timetable.departure,
+            "line": timetable.line,
+            "company": timetable.company,
+            "next_dest": timetable.dest,
+        }
+    )
+    ends = pd.DataFrame(
+        {
+            "stop": timetable.dest,
+            "time": timetable.arrival,
+            "line": timetable.line,
+            "company": timetable.company,
+            "origin": start,
+        }
+    )
+    links = ends.reset_index().merge(
+        rows.reset_index(), on=["stop", "time", "line", "company"], suffixes=("", "_next")
+    )
+    # prefer continuing forward over turning back to the previous stop
+    links["u_turn"] = links["next_dest"] == links["origin"]
+    links = links.sort_values(["u_turn", "index", "index_next"], kind="stable")
+    links = links.drop_duplicates("index").drop_duplicates("index_next")
+
+    next_row = np.full(count, -1, dtype=np.int64)
+    next_row[links["index"].to_numpy()] = links["index_next"].to_numpy()
+    has_previous = np.zeros(count, dtype=bool)
+    has_previous[links["index_next"].to_numpy()] = True
+
+    next_row_list = next_row.tolist()
+    assigned = np.zeros(count, dtype=bool)
+    trips = []
+    for head in np.flatnonzero(~has_previous).tolist():
+        trip = []
+        row = head
+        while row != -1:
+            trip.append(row)
+            row = next_row_list[row]
+        assigned[trip] = True
+        trips.append(trip)
+    # rows linked into a cycle have no head, treat each as separate trip
+    trips.extend([row] for row in np.flatnonzero(~assigned).tolist())
+    return trips
+
+
+class RaptorIndex:
+    def __init__(self, timetable: Timetable) -> None:
+        self.timetable = timetable
+        departure = timetable.departure.tolist()
+        arrival = timetable.arrival.tolist()
+        dest = timetable.dest.tolist()
+        start = timetable.start_stops().tolist()
+
+        by_pattern: Dict[Tuple[int, ...], List[Trip]] = defaultdict(list)
+        for rows in infer_trips(timetable):
+            pattern = (start[rows[0]], *(dest[row] for row in rows))
+            by_pattern[pattern].append(
+                Trip(
+                    [departure[row] for row in rows],
+                    [arrival[row] for row in rows],
+                    rows,
+                )
+            )
+
+        self.routes: List[Route] = []
+        for pattern, trips in by_pattern.items():
+            trips.sort(key=lambda trip: (trip.departures[0], trip.arrivals[-1]))
+            variants: List[List[Trip]] = []
+            for trip in trips:
+                for variant in variants:
+                    if not self._overtakes(trip, variant[-1]):
+                        variant.append(trip)
+                        break
+                else:
+                    variants.append([trip])
+            for variant in variants:
+                self.routes.append(
+                    Route(
+                        list(pattern),
+                        variant,
+                        [
+                            [trip.departures[j] for trip in variant]
+                            for j in range(len(pattern) - 1)
+                        ],
+                    )
+                )
+
+        self.stop_routes: List[List[Tuple[int, int]]] = [
+            [] for _ in range(timetable.stop_count)
+        ]
+        for route_id, route in enumerate(self.routes):
+            for position, stop in enumerate(route.stops[:-1]):
+                self.stop_routes[stop].append((route_id, position))
+
+    @staticmethod
+    def _overtakes(trip: Trip, previous: Trip) -> bool:
+        return any(
+            departure < previous_departure or arrival < previous_arrival
+            for departure, previous_departure, arrival, previous_arrival in zip(
+                trip.departures, previous.departures, trip.arrivals, previous.arrivals
+            )
+        )
+
+    def query(
+        self, start: int, end: int, start_time: int, max_rounds: int = 6
+    ) -> List[Tuple[int, int, List[int]]]:
+        """
+        Pareto set of journeys as (arrival, trips used, rows),
+        one per number of trips that improved arrival at `end`
+        """
+        if start == end:
+            return [(start_time, 0, [])]
+        inf = float("inf")
+        best: List[Number] = [inf] * self.timetable.stop_count
+        best[start] = start_time
+        previous_round = best[:]
+        parents: List[Dict[int, Tuple[int, int, int, int]]] = []
+        marked = {start}
+        journeys = []
+        for k in range(1, max_rounds + 1):
+            queue: Dict[int, int] = {}
+            for stop in marked:
+                for route_id, position in self.stop_routes[stop]:
+                    if position < queue.get(route_id, inf):
+                        queue[route_id] = position
+
+            marked = set()
+            current_round = previous_round[:]
+            round_parents: Dict[int, Tuple[int, int, int, int]] = {}
+            for route_id, position in queue.items():
+                route = self.routes[route_id]
+                stops = route.stops
+                trips = route.trips
+                last = len(stops) - 1
+                trip_id = None
+                board = None
+                for j in range(position, last + 1):
+                    stop = stops[j]
+                    if trip_id is not None:
+                        arrival = trips[trip_id].arrivals[j - 1]
+                        if arrival < best[stop] and arrival < best[end]:
+                            best[stop] = arrival
+                            current_round[stop] = arrival
+                            round_parents[stop] = route_id, trip_id, board, j
+                            marked.add(stop)
+                    if j == last:
+                        break
+                    ready = previous_round[stop]
+                    if ready == inf:
+                        continue
+                    if trip_id is None:
+                        catchable = bisect_left(route.stop_departures[j], ready)
+                        if catchable == len(trips):
+                            continue
+                    # trips do not overtake, earlier trip is catchable only
+                    # when the one right before current departs late enough
+                    elif trip_id > 0 and trips[trip_id - 1].departures[j] >= ready:
+                        catchable = bisect_left(route.stop_departures[j], ready, 0, trip_id)
+                    else:
+                        continue
+                    trip_id = catchable
+                    board = j
+
+            parents.append(round_parents)
+            if end in round_parents:
+                journeys.append((best[end], k, self._rows(parents, start, end, k)))
+            if not marked:
+                break
+            previous_round = current_round
+        return journeys
+
+    def _rows(
+        self,
+        parents: List[Dict[int, Tuple[int, int, int, int]]],
+        start: int,
+        end: int,
+        rounds: int,
+    ) -> List[int]:
+        legs = []
+        stop = end
+        k = rounds
+        while stop != start:
+            parent = parents[k - 1].get(stop)
+            k -= 1
+            if parent is None:
+                continue
+            route_id, trip_id, board, alight = parent
+            route = self.routes[route_id]
+            legs.append(route.trips[trip_id].rows[board:alight])
+            stop = route.stops[board]
+        return [row for leg in reversed(legs) for row in leg]
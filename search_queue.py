@@ -0,0 +1,140 @@
+"""
+    Priority queues of graph searches, selected with `queue` option
+    of Graph searches. Entries are (priority, arrival, item) triples
+"""
+
+import heapq
+import itertools
+from numbers import Number
+from typing import Any, List, Optional, Tuple
+from heapq_priority_item import PriorityItem
+
+QueueEntry = Tuple[Number, Any, Any]
+
+
+class HeapQueue:
+    """heapq of PriorityItem, the original queue of searches"""
+
+    MONOTONE = False
+
+    def __init__(self) -> None:
+        self._heap: List[PriorityItem] = []
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, priority: Number, arrival: Any, item: Any) -> None:
+        heapq.heappush(self._heap, PriorityItem(priority, arrival, item))
+
+    def pop(self) -> QueueEntry:
+        entry = heapq.heappop(self._heap)
+        return entry.priority, entry.arrival, entry.item
+
+
+class TupleHeap:
+    """
+    heapq of plain tuples, compared in C instead of dataclass __lt__.
+    Insertion counter breaks ties, arrivals and items are never compared
+    """
+
+    MONOTONE = False
+
+    def __init__(self) -> None:
+        self._heap: List[Tuple[Number, int, Any, Any]] = []
+        self._counter = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, priority: Number, arrival: Any, item: Any) -> None:
+        heapq.heappush(self._heap, (priority, next(self._counter), arrival, item))
+
+    def pop(self) -> QueueEntry:
+        priority, _, arrival, item = heapq.heappop(self._heap)
+        return priority, arrival, item
+
+
+class BucketQueue:
+    """
+    Dial's bucket queue, one bucket per integer priority (second of
+    the day) counted from the first pushed priority. Pop takes entries
+    from the bucket under a cursor, which only moves forward.
+    Note:
+        - Only for monotone searches, no push below priority of
+          the last pop, e.g. dijkstra on arrival times. Lower priority
+          raises ValueError, non-integer one TypeError
+        - Push is O(1) once popping started, pops together move
+          the cursor once over seconds between the first and last priority
+        - Entries of equal priority are popped first in, first out
+    """
+
+    MONOTONE = True
+
+    def __init__(self) -> None:
+        self._buckets: List[Optional[List[Tuple[Any, Any]]]] = []
+        self._base = 0
+        self._cursor = 0
+        # entries of the cursor bucket already popped
+        self._position = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def push(self, priority: int, arrival: Any, item: Any) -> None:
+        buckets = self._buckets
+        if not buckets:
+            self._base = priority
+        index = priority - self._base
+        if index < 0 and not (self._cursor or self._position):
+            # nothing popped yet, buckets start at the lowest priority
+            buckets[:0] = [None] * -index
+            self._base = priority
+            index = 0
+        if index < self._cursor:
+            raise ValueError(
+                f"Priority {priority} is lower than the last popped {self._base + self._cursor}"
+            )
+        if index >= len(buckets):
+            buckets.extend([None] * (index - len(buckets) + 1))
+        bucket = buckets[index]
+        if bucket is None:
+            buckets[index] = [(arrival, item)]
+        else:
+            bucket.append((arrival, item))
+        self._size += 1
+
+    def pop(self) -> QueueEntry:
+        if not self._size:
+            raise IndexError("pop from empty queue")
+        buckets = self._buckets
+        cursor = self._cursor
+        bucket = buckets[cursor]
+        while bucket is None or self._position == len(bucket):
+            buckets[cursor] = None
+            cursor += 1
+            self._position = 0
+            bucket = buckets[cursor]
+        self._cursor = cursor
+        arrival, item = bucket[self._position]
+        self._position += 1
+        self._size -= 1
+        return self._base + cursor, arrival, item
+
+
+QUEUES = {"heap": HeapQueue, "tuple": TupleHeap, "bucket": BucketQueue}
+
+
+def create_queue(kind: str, monotone: bool = False):
+    """
+    `monotone` searches push only integer priorities not lower than
+    the last popped one, queues relying on it are rejected for others
+    """
+    try:
+        queue_class = QUEUES[kind]
+    except KeyError:
+        raise ValueError(f"Unknown queue: {kind}, expected one of {sorted(QUEUES)}") from None
+    if queue_class.MONOTONE and not monotone:
+        raise ValueError(f"Queue {kind} needs monotone integer priorities, use one of "
+                         f"{sorted(name for name, other in QUEUES.items() if not other.MONOTONE)}")
+    return queue_class()
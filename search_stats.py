@@ -0,0 +1,130 @@
+"""
+    Opt-in per-query counters of graph searches and tabu search,
+    see Graph.stats_callback and Tabu.stats_callback
+"""
+
+from collections import deque
+from dataclasses import asdict, dataclass, field, fields
+import heapq
+import json
+from typing import Any, Callable, Deque, Dict, List, Optional, TextIO
+
+
+@dataclass
+class SearchStats:
+    """
+    Work done by single search, stops are stop ids and times seconds.
+    Note:
+        - Stale pops are pops of stops already expanded by the search
+        - `phases` holds seconds spent in setup (labels, heuristic),
+          search loop and path reconstruction
+    """
+
+    algorithm: str
+    start: int
+    end: int
+    start_time: int
+    found: bool = False
+    visited: int = 0
+    pushes: int = 0
+    pops: int = 0
+    stale_pops: int = 0
+    edges_scanned: int = 0
+    edges_relaxed: int = 0
+    heuristic_calls: int = 0
+    phases: Dict[str, float] = field(default_factory=dict)
+
+    COUNTERS = (
+        "visited", "pushes", "pops", "stale_pops",
+        "edges_scanned", "edges_relaxed", "heuristic_calls",
+    )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict())
+
+
+@dataclass
+class TabuStats:
+    """
+    Work done by single Tabu.tabu_search_v2. `searches` sums counters
+    and phases of graph searches run for its legs (a_star for hops,
+    earliest_arrival_tree scans for time), only those run in this process.
+    `phases` holds seconds spent in initial tour evaluation,
+    neighbour generation and neighbour evaluation
+    """
+
+    algorithm: str
+    start: int
+    stops: int
+    start_time: int
+    criteria: str
+    cost: Optional[float] = None
+    iterations: int = 0
+    candidates: int = 0
+    pruned: int = 0
+    legs_searched: int = 0
+    leg_cache_hits: int = 0
+    searches: Dict[str, float] = field(default_factory=dict)
+    phases: Dict[str, float] = field(default_factory=dict)
+
+    def add_search(self, stats: SearchStats) -> None:
+        self.searches["count"] = self.searches.get("count", 0) + 1
+        for name in SearchStats.COUNTERS:
+            self.searches[name] = self.searches.get(name, 0) + getattr(stats, name)
+        for phase, seconds in stats.phases.items():
+            key = f"{phase}_seconds"
+            self.searches[key] = self.searches.get(key, 0.0) + seconds
+
+    def add_phase(self, phase: str, seconds: float) -> None:
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict())
+
+
+StatsCallback = Callable[[Any], None]
+
+
+class StatsLog:
+    """
+    Stats callback keeping the last `limit` records, worst() finds
+    pathological queries, e.g.
+        graph.stats_callback = log = StatsLog(10_000)
+        ...
+        for stats in log.worst(10, "edges_scanned"): print(stats.to_json())
+    """
+
+    def __init__(self, limit: Optional[int] = None) -> None:
+        self.records: Deque[Any] = deque(maxlen=limit)
+
+    def __call__(self, stats: Any) -> None:
+        self.records.append(stats)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def worst(self, count: int = 10, key: str = "edges_scanned") -> List[Any]:
+        """Records with the largest counter `key`, or phase of that name"""
+        def value(stats: Any) -> float:
+            if key in {f.name for f in fields(stats)}:
+                return getattr(stats, key)
+            return stats.phases.get(key, 0.0)
+
+        return heapq.nlargest(count, self.records, key=value)
+
+    def to_json(self) -> str:
+        return json.dumps([stats.to_dict() for stats in self.records])
+
+
+def json_lines_writer(file: TextIO) -> StatsCallback:
+    """Stats callback writing one JSON line per record to open `file`"""
+    def write(stats: Any) -> None:
+        file.write(stats.to_json() + "\n")
+
+    return write
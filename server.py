@@ -0,0 +1,147 @@
+"""
+    Routing daemon, loads graphs once and answers zadanie_1 / zadanie_2
+    command lines sent by client.py. Requests and responses are JSON lines
+    over Unix socket (or TCP on localhost), searches run in process pool
+"""
+
+import argparse
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import traceback
+from typing import Any, Dict, List, Optional
+from client import SOCKET_PATH
+from graph import Graph
+from query_cache import QueryCache
+import zadanie_1
+import zadanie_2
+
+PROGRAMS = {"zadanie_1": zadanie_1, "zadanie_2": zadanie_2}
+
+_graphs: Dict[str, Graph] = {}
+
+
+def load_graphs() -> None:
+    for name, program in PROGRAMS.items():
+        _graphs[name] = program.load_graph()
+        _graphs[name].query_cache = QueryCache()
+
+
+def init_worker(inherited: bool) -> None:
+    """
+    Forked workers inherit loaded graphs, spawned ones build them
+    over the memory-mapped snapshot, sharing its pages with each other
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if not inherited:
+        load_graphs()
+
+
+def run_program(name: str, argv: List[str]) -> Dict[str, Any]:
+    """Output and exit code of CLI main run on preloaded graph"""
+    stdout, stderr = io.StringIO(), io.StringIO()
+    code = 0
+    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        try:
+            PROGRAMS[name].main(argv, _graphs[name])
+        except SystemExit as error:
+            if error.code is None or isinstance(error.code, int):
+                code = error.code or 0
+            else:
+                print(error.code, file=sys.stderr)
+                code = 1
+        except Exception:
+            traceback.print_exc()
+            code = 1
+    return {"stdout": stdout.getvalue(), "stderr": stderr.getvalue(), "code": code}
+
+
+async def handle_client(
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+    executor: ProcessPoolExecutor,
+) -> None:
+    loop = asyncio.get_running_loop()
+    try:
+        while line := await reader.readline():
+            try:
+                request = json.loads(line)
+                name = request["program"]
+                argv = [str(arg) for arg in request["argv"]]
+                if name not in PROGRAMS:
+                    raise KeyError(name)
+            except (ValueError, KeyError, TypeError):
+                response = {"stdout": "", "stderr": "Nieprawidłowe zapytanie\n", "code": 2}
+            else:
+                response = await loop.run_in_executor(executor, run_program, name, argv)
+            writer.write(json.dumps(response).encode() + b"\n")
+            await writer.drain()
+    except ConnectionError:
+        pass  # client went away, its query result is dropped
+    finally:
+        writer.close()
+        with contextlib.suppress(ConnectionError):
+            await writer.wait_closed()
+
+
+async def serve(executor: ProcessPoolExecutor, socket_path: str, port: Optional[int]) -> None:
+    handler = lambda reader, writer: handle_client(reader, writer, executor)
+    if port is not None:
+        server = await asyncio.start_server(handler, "127.0.0.1", port)
+    else:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = await asyncio.start_unix_server(handler, socket_path)
+    print(f"Serwer gotowy: {port if port is not None else socket_path}", file=sys.stderr)
+    async with server:
+        await server.serve_forever()
+
+
+def get_args():
+    parser = argparse.ArgumentParser(
+        prog="server",
+        description="Serwer wyszukiwania połączeń, graf jest wczytywany raz",
+    )
+    parser.add_argument("-s", "--socket", help="Ścieżka gniazda Unix", default=SOCKET_PATH)
+    parser.add_argument("-p", "--port", help="Port TCP na localhost zamiast gniazda Unix", type=int)
+    parser.add_argument(
+        "-w",
+        "--workers",
+        help="Liczba procesów obsługujących zapytania",
+        type=int,
+        default=os.cpu_count(),
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = get_args()
+    # also writes snapshot before workers start, so they only map it
+    load_graphs()
+    fork = "fork" in multiprocessing.get_all_start_methods()
+    executor = ProcessPoolExecutor(
+        args.workers,
+        mp_context=multiprocessing.get_context("fork" if fork else "spawn"),
+        initializer=init_worker,
+        initargs=(fork,),
+    )
+    # forked workers are all started with the first task
+    executor.submit(os.getpid).result()
+    try:
+        asyncio.run(serve(executor, args.socket, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        executor.shutdown(cancel_futures=True)
+        if args.port is None and os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+
+if __name__ == '__main__':
+    main()
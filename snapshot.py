@@ -0,0 +1,194 @@
+"""
+    Versioned binary snapshot of Timetable, loaded with mmap
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+from typing import Any, Dict, Optional
+import numpy as np
+from timetable import Timetable
+
+
+MAGIC = b"JDSNAP\0\0"
+VERSION = 1
+PREAMBLE = struct.Struct("<8sII")
+ALIGNMENT = 64
+# spaces after header json, room for refreshed source fingerprint
+HEADER_SLACK = 32
+ARRAYS = (
+    "latitude",
+    "longitude",
+    "offsets",
+    "departure",
+    "arrival",
+    "dest",
+    "line",
+    "company",
+)
+
+
+class SnapshotError(Exception):
+    """Snapshot is missing, corrupted or written by other version"""
+
+
+class StaleSnapshotError(SnapshotError):
+    """Source CSV changed since snapshot was written"""
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_fingerprint(path: str) -> Dict[str, Any]:
+    stat = os.stat(path)
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": file_hash(path),
+    }
+
+
+def is_fresh(fingerprint: Optional[Dict[str, Any]], source: str) -> bool:
+    """
+    Size and mtime match is enough, hash is computed only
+    when mtime changed but size did not (eg. file was copied or touched),
+    see load_timetable for recording the new mtime
+    """
+    if fingerprint is None:
+        return False
+    stat = os.stat(source)
+    if stat.st_size != fingerprint["size"]:
+        return False
+    if stat.st_mtime_ns == fingerprint["mtime_ns"]:
+        return True
+    return file_hash(source) == fingerprint["sha256"]
+
+
+def _plain(value: Any) -> Any:
+    """Numpy scalars from pandas are not json serializable"""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _align(position: int) -> int:
+    return -position % ALIGNMENT
+
+
+def save_timetable(
+    timetable: Timetable, path: str, source: Optional[str] = None
+) -> None:
+    arrays = {name: np.ascontiguousarray(getattr(timetable, name)) for name in ARRAYS}
+    header = {
+        "source": source_fingerprint(source) if source else None,
+        "stop_names": timetable.stop_names,
+        "lines": [_plain(line) for line in timetable.lines],
+        "companies": [_plain(company) for company in timetable.companies],
+        "arrays": {},
+    }
+    # array offsets are relative to aligned data section following the header
+    position = 0
+    for name, array in arrays.items():
+        header["arrays"][name] = [array.dtype.str, position, len(array)]
+        position += array.nbytes
+        position += _align(position)
+    header_bytes = json.dumps(header).encode() + b" " * HEADER_SLACK
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(PREAMBLE.pack(MAGIC, VERSION, len(header_bytes)))
+        file.write(header_bytes)
+        data_start = file.tell() + _align(file.tell())
+        for name, array in arrays.items():
+            file.write(b"\0" * (data_start + header["arrays"][name][1] - file.tell()))
+            file.write(array.tobytes())
+    os.replace(tmp_path, path)
+
+
+def _read_header(buffer: mmap.mmap, path: str, header_length: int) -> Dict[str, Any]:
+    try:
+        header = json.loads(buffer[PREAMBLE.size:PREAMBLE.size + header_length].decode())
+        fingerprint = header["source"]
+        if fingerprint is not None and not {"size", "mtime_ns", "sha256"} <= set(fingerprint):
+            raise ValueError(f"source fingerprint {fingerprint}")
+        if set(header["arrays"]) != set(ARRAYS):
+            raise ValueError(f"arrays {sorted(header['arrays'])}")
+        for dtype, offset, count in header["arrays"].values():
+            if not isinstance(offset, int) or not isinstance(count, int):
+                raise ValueError("array offset and length must be integers")
+            np.dtype(dtype)
+        for key in ("stop_names", "lines", "companies"):
+            if not isinstance(header[key], list):
+                raise ValueError(f"{key} must be a list")
+    except (ValueError, KeyError, TypeError, AttributeError) as error:
+        raise SnapshotError(f"Snapshot {path} has corrupted header: {error!r}") from error
+    return header
+
+
+def _rewrite_header(path: str, header: Dict[str, Any], header_length: int) -> None:
+    """Rewrites header in place when it fits, padded with spaces json ignores"""
+    header_bytes = json.dumps(header).encode()
+    if len(header_bytes) > header_length:
+        return
+    try:
+        with open(path, "r+b") as file:
+            file.seek(PREAMBLE.size)
+            file.write(header_bytes.ljust(header_length))
+    except OSError:
+        pass  # read-only location, the hash is only computed again
+
+
+def load_timetable(path: str, source: Optional[str] = None) -> Timetable:
+    """
+    Arrays are zero-copy read-only views into the mapped file.
+    With `source` given raises StaleSnapshotError when CSV changed.
+    When only its mtime changed, the new one is written to the snapshot,
+    so the CSV is hashed once after touch or checkout
+    """
+    try:
+        with open(path, "rb") as file:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError) as error:
+        raise SnapshotError(f"Cannot open snapshot {path}: {error}") from error
+
+    if len(buffer) < PREAMBLE.size:
+        raise SnapshotError(f"Snapshot {path} is truncated")
+    magic, version, header_length = PREAMBLE.unpack_from(buffer)
+    if magic != MAGIC:
+        raise SnapshotError(f"{path} is not a graph snapshot")
+    if version != VERSION:
+        raise SnapshotError(f"Snapshot version {version}, expected {VERSION}")
+    header = _read_header(buffer, path, header_length)
+    if source is not None:
+        fingerprint = header["source"]
+        if not is_fresh(fingerprint, source):
+            raise StaleSnapshotError(f"Snapshot {path} is older than {source}")
+        mtime_ns = os.stat(source).st_mtime_ns
+        if mtime_ns != fingerprint["mtime_ns"]:
+            header["source"] = dict(fingerprint, mtime_ns=mtime_ns)
+            _rewrite_header(path, header, header_length)
+
+    data_start = PREAMBLE.size + header_length
+    data_start += _align(data_start)
+    try:
+        arrays = {
+            name: np.frombuffer(
+                buffer, dtype=np.dtype(dtype), count=count, offset=data_start + offset
+            )
+            for name, (dtype, offset, count) in header["arrays"].items()
+        }
+    except ValueError as error:
+        raise SnapshotError(f"Snapshot {path} is truncated: {error}") from error
+    timetable = Timetable(
+        header["stop_names"],
+        lines=header["lines"],
+        companies=header["companies"],
+        **arrays,
+    )
+    timetable.mmap = buffer
+    return timetable
@@ -1,52 +1,238 @@
 import itertools
+import math
+import multiprocessing
 import random
+from typing import Iterable, Iterator, NamedTuple
 from graph import *
+from leg_cache import LegCache
+from search_stats import SearchStats, StatsCallback, TabuStats
 from zadanie_1 import print_detailed_solution, print_solution
 random.seed(255)
 
+
+@dataclass
+class TourEvaluation:
+    """
+    arrivals[i] and costs[i] are arrival time and cumulative cost
+    at solution[i], legs[i] leads from solution[i] to solution[i+1]
+    """
+    solution: Tuple[Node, ...]
+    arrivals: List[Timestamp]
+    costs: List[Number]
+    legs: List[List[Edge]]
+
+    @property
+    def cost(self) -> Number:
+        return self.costs[-1]
+
+    @property
+    def path(self) -> List[Edge]:
+        return [edge for leg in self.legs for edge in leg]
+
+
+class Move(NamedTuple):
+    """
+    Neighbour of a tour described by positions, the tour itself
+    is built by apply() only when it is evaluated.
+        swap   - exchange stops at i and j
+        2-opt  - reverse stops from i to j
+        or-opt - move `length` stops starting at i to position j
+                 of the tour without them
+    """
+    kind: str
+    i: int
+    j: int
+    length: int = 1
+
+    def apply(self, solution: Tuple[Node, ...]) -> Tuple[Node, ...]:
+        i, j = self.i, self.j
+        if self.kind == 'swap':
+            neighbour = list(solution)
+            neighbour[i], neighbour[j] = neighbour[j], neighbour[i]
+            return tuple(neighbour)
+        if self.kind == '2-opt':
+            return solution[:i] + solution[j:i-1:-1] + solution[j+1:]
+        rest = solution[:i] + solution[i+self.length:]
+        return rest[:j] + solution[i:i+self.length] + rest[j:]
+
+    def nodes(self, solution: Tuple[Node, ...]) -> Tuple[Node, Node]:
+        """Pair of stops identifying the move on tabu list"""
+        if self.kind == 'swap':
+            return solution[self.j], solution[self.i]
+        if self.kind == '2-opt':
+            return solution[self.i], solution[self.j]
+        before = self.j if self.j < self.i else self.j + self.length
+        return solution[self.i], solution[before]
+
+
 class Tabu:
     STEP_LIMIT = 10
     OPERATION_LIMIT = 5
     TABU_LEN = 10
-    def __init__(self, graph: Graph, criteria: Literal['time', 'hops'] = 'time') -> None:
+    OR_OPT_LENGTH = 3
+    MOVE_KINDS = ('swap', '2-opt', 'or-opt')
+    def __init__(
+        self,
+        graph: Graph,
+        criteria: Literal['time', 'hops'] = 'time',
+        leg_cache: Optional[LegCache] = None,
+        workers: int = 1,
+        moves: Sequence[str] = ('swap',),
+        stats_callback: Optional[StatsCallback] = None,
+    ) -> None:
+        """
+        `leg_cache` can be shared between Tabu instances of long running process.
+        With `workers` > 1 neighbours are evaluated in process pool,
+        started on first use and stopped by close(). Without fork the
+        workers load the graph from graph.source_path, which must be set.
+        `moves` are kinds of Move sampled as neighbours.
+        `stats_callback` receives TabuStats of every tabu_search_v2
+        """
+        unknown = set(moves) - set(self.MOVE_KINDS)
+        if unknown:
+            raise ValueError(f"Unknown move kinds: {sorted(unknown)}")
+        if workers > 1 and not _can_fork() and not graph.source_path:
+            raise ValueError(
+                "Spawned workers load the graph from its CSV, but the graph has no "
+                "source_path (e.g. Graph.load_snapshot without source), use workers=1"
+            )
         self.graph = graph
         self.criteria = criteria
+        self.moves = tuple(moves)
+        self.tour_nodes: List[Node] = []
+        self.leg_cache = leg_cache if leg_cache is not None else LegCache()
+        self.workers = workers
+        self._pool = None
+        self.stats_callback = stats_callback
+        self._stats: Optional[TabuStats] = None
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def _get_pool(self):
+        """
+        Forked workers inherit the graph, otherwise each worker
+        maps the timetable snapshot next to the CSV
+        """
+        if self._pool is None:
+            if _can_fork():
+                context = multiprocessing.get_context("fork")
+                initargs = (self.graph, self.criteria, {})
+            else:
+                context = multiprocessing.get_context("spawn")
+                initargs = (
+                    self.graph.source_path,
+                    self.criteria,
+                    {
+                        "cost_estimation_scale": self.graph.cost_estimation_scale,
+                        "hop_penalty": self.graph.hop_penalty,
+                        "hub_bonus": self.graph.hub_bonus,
+                        "next_departure_table": self.graph.timetable.has_next_departure_table,
+                    },
+                )
+            self._pool = context.Pool(self.workers, _init_worker, initargs)
+        return self._pool
 
     def compute_solution_cost(self, solution: List[Node], arrival_time: Timestamp) -> Tuple[List[Edge], Number]:
-        cost = 0
-        path = []
-        for i in range(len(solution)-1):
-            from_node = solution[i]
-            to_node = solution[i+1]
-            partial_path,  partial_cost = self.get_partial_solution(from_node, to_node, arrival_time)
+        evaluation = self.evaluate_solution(tuple(solution), arrival_time)
+        if evaluation is None:
+            return None, float('inf')
+        return evaluation.path, evaluation.cost
+
+    def evaluate_solution(
+        self,
+        solution: Tuple[Node, ...],
+        arrival_time: Timestamp,
+        base: Optional[TourEvaluation] = None,
+        bound: Number = float('inf'),
+    ) -> Optional[TourEvaluation]:
+        """
+        Legs of `base` before the first position where `solution` differs
+        are reused, only the suffix is searched.
+        Returns None for infeasible tour or once partial cost reaches `bound`
+        """
+        arrivals, costs, legs = [arrival_time], [0], []
+        if base is not None and len(base.solution) == len(solution):
+            first_change = 0
+            while first_change < len(solution) and solution[first_change] is base.solution[first_change]:
+                first_change += 1
+            if first_change == len(solution):
+                return base
+            if first_change > 0:
+                arrivals = base.arrivals[:first_change]
+                costs = base.costs[:first_change]
+                legs = base.legs[:first_change-1]
+        for i in range(len(legs), len(solution)-1):
+            partial_path, partial_cost = self.get_partial_solution(solution[i], solution[i+1], arrivals[i])
             if partial_cost is None:
-                return None, float('inf')
-            cost += partial_cost
-            arrival_time = partial_path[-1].arrival_time
-            path.extend(partial_path)
-        return path, cost
+                return None
+            cost = costs[i] + partial_cost
+            if cost >= bound:
+                if self._stats is not None:
+                    self._stats.pruned += 1
+                return None
+            arrivals.append(partial_path[-1].arrival_time if partial_path else arrivals[i])
+            costs.append(cost)
+            legs.append(partial_path)
+        return TourEvaluation(solution, arrivals, costs, legs)
 
-    @cache
     def get_partial_solution(self, from_node: Node, to_node: Node, from_time: Timestamp) -> Tuple[List[Edge], Number]:
-        path, _, cost= self.graph.a_star(from_node, to_node, from_time, self.criteria)
+        leg = self.leg_cache.get((self.criteria, from_node.id, to_node.id), from_time.time)
+        if self._stats is not None:
+            if leg is None:
+                self._stats.legs_searched += 1
+            else:
+                self._stats.leg_cache_hits += 1
+        if leg is None:
+            if self.criteria == 'time':
+                leg = self.compute_legs_from(from_node, to_node, from_time)
+            else:
+                path, _, cost = self.graph.a_star(from_node, to_node, from_time, self.criteria)
+                leg = path, cost
+                self.store_leg(from_node, to_node, from_time, path, cost)
+        path, cost = leg
+        if self.criteria == 'time' and path:
+            cost = path[-1].arrival_time.time - from_time.time
         return path, cost
-    
-    def get_neighbours(self, solution: Tuple[Node, ...]) -> List[Tuple[Node, ...]]:
-        neighbouring_solutions = []
-        solution_length = len(solution)
-        for i in range(solution_length-3, 0, -1):
-            for j in range(solution_length-2, 0, -1):
-                if i != j:
-                    neighbour = list(solution)
-                    neighbour[i], neighbour[j] = neighbour[j], neighbour[i]
-                    neighbouring_solutions.append(tuple(neighbour))
 
-        return neighbouring_solutions
+    def compute_legs_from(self, from_node: Node, to_node: Node, from_time: Timestamp) -> Tuple[List[Edge], Number]:
+        """
+        One scan per (source, departure) answers legs to every tour stop,
+        all of them are cached
+        """
+        targets = list({*self.tour_nodes, to_node} - {from_node})
+        paths = self.graph.one_to_many(from_node, from_time, targets)
+        for target, path in paths.items():
+            self.store_leg(from_node, target, from_time, path, None if path is None else 0)
+        path = paths.get(to_node, [])
+        return path, None if path is None else 0
+
+    def store_leg(self, from_node: Node, to_node: Node, from_time: Timestamp, path: Optional[List[Edge]], cost: Optional[Number]) -> None:
+        """
+        Leg is reused for departures after the previous departure from
+        from_node, earliest arrival journeys also until they depart
+        """
+        low = self.graph.timetable.previous_departure(from_node.id, from_time.time)
+        if not path:
+            high = EarliestArrivalTree.UNREACHABLE
+        elif self.criteria == 'time':
+            high = path[0].departure_time.time
+        else:
+            high = from_time.time
+        self.leg_cache.put((self.criteria, from_node.id, to_node.id), low, high, (path, cost))
+
+    def get_neighbours(self, solution: Tuple[Node, ...]) -> Iterator[Tuple[Node, ...]]:
+        for move in self.get_neighbours_v2(solution):
+            yield move.apply(solution)
     
 
     def tabu_search(self, start_node: Node, node_list: List[Node], start: Timestamp) -> Tuple[List[Edge], Tuple[Node, ...], Number]:
         k = 0
         random.shuffle(node_list)
+        self.tour_nodes = [start_node]+node_list
         best_solution = tuple([start_node]+node_list+[start_node])
         best_path, best_cost = self.compute_solution_cost(best_solution, start)
         tabu = set()
@@ -54,10 +240,9 @@ class Tabu:
         while k < self.STEP_LIMIT:
             for _ in range(self.OPERATION_LIMIT):
                 solutions = self.get_neighbours(local_min)
-                local_min = solutions[0]
+                local_min = next(solutions)
                 local_min_path, local_min_cost = self.compute_solution_cost(local_min, start)
-                for i in range(1, len(solutions)):
-                    solution = solutions[i]
+                for solution in solutions:
                     if solution in tabu:
                         continue
                     path, cost = self.compute_solution_cost(solution, start)
@@ -73,76 +258,250 @@ class Tabu:
             k += 1
         return best_path, best_solution, best_cost
     
-    def get_neighbours_v2(self, solution: Tuple[Node, ...]) -> List[Tuple[Tuple[Node, ...], Tuple[Node, Node]]]:
-        neighbouring_solutions = []
+    def get_neighbours_v2(self, solution: Tuple[Node, ...]) -> Iterator[Move]:
+        """All swap moves"""
         solution_length = len(solution)
         for i in range(solution_length-3, 0, -1):
             for j in range(solution_length-2, 0, -1):
                 if i != j:
-                    neighbour = list(solution)
-                    neighbour[i], neighbour[j] = neighbour[j], neighbour[i]
-                    neighbouring_solutions.append((tuple(neighbour), (neighbour[i], neighbour[j])))
+                    yield Move('swap', i, j)
 
-        return neighbouring_solutions
+    def get_neighbours_v2_1(self, solution: Tuple[Node, ...]) -> Iterator[Move]:
+        """
+        Random neighbourhood probing, len(solution) moves drawn with
+        replacement from all moves of kinds in self.moves without listing
+        them. Swap moves are numbered like in get_neighbours_v2, so swap
+        only sampling draws the same moves as random.choices over that list
+        """
+        interior = len(solution) - 2
+        counts = [self.count_moves(kind, interior) for kind in self.moves]
+        total = sum(counts)
+        if not total:
+            return
+        for _ in range(len(solution)):
+            index = math.floor(random.random() * total)
+            for kind, count in zip(self.moves, counts):
+                if index < count:
+                    yield self.decode_move(kind, index, interior)
+                    break
+                index -= count
 
-    def get_neighbours_v2_1(self, solution: Tuple[Node, ...]) -> List[Tuple[Tuple[Node, ...], Tuple[Node, Node]]]:
-        """Random neighbourhood probing"""
-        max_solutions = len(solution)
-        neighbouring_solutions = []
-        solution_length = len(solution)
-        for i in range(solution_length-3, 0, -1):
-            for j in range(solution_length-2, 0, -1):
-                if i != j:
-                    neighbour = list(solution)
-                    neighbour[i], neighbour[j] = neighbour[j], neighbour[i]
-                    neighbouring_solutions.append((tuple(neighbour), (neighbour[i], neighbour[j])))
-        return random.choices(neighbouring_solutions, k=max_solutions)
+    def count_moves(self, kind: str, interior: int) -> int:
+        """Number of moves of `kind` for tour with `interior` intermediate stops"""
+        if kind == 'swap':
+            return max(interior - 1, 0) ** 2
+        if kind == '2-opt':
+            return interior * (interior - 1) // 2
+        return sum(
+            (interior - length + 1) * (interior - length)
+            for length in range(1, min(self.OR_OPT_LENGTH, interior - 1) + 1)
+        )
+
+    def decode_move(self, kind: str, index: int, interior: int) -> Move:
+        if kind == 'swap':
+            i = interior - 1 - index // (interior - 1)
+            j = interior - index % (interior - 1)
+            return Move(kind, i, j if j > i else j - 1)
+        if kind == '2-opt':
+            i = 1
+            while index >= interior - i:
+                index -= interior - i
+                i += 1
+            return Move(kind, i, i + 1 + index)
+        length = 1
+        while index >= (interior - length + 1) * (interior - length):
+            index -= (interior - length + 1) * (interior - length)
+            length += 1
+        i = 1 + index // (interior - length)
+        j = 1 + index % (interior - length)
+        return Move(kind, i, j if j < i else j + 1, length)
     def hash_nodes(self, node1: Node, node2: Node) -> int:
         """ Create distinct hash for nodes, ignore order"""
         return hash(node2.stop_name + node1.stop_name)
 
-    def pick_best(self, solutions: List[Tuple[Node, ...]], tabu, start) -> Tuple[List[Edge], Tuple[Node, ...]]:
-        local_min = None
-        local_min_path, local_min_cost = None, None
-        for solution, nodes in solutions:
-            solution_hash = self.hash_nodes(*nodes)
+    def pick_best(
+        self,
+        solution: Tuple[Node, ...],
+        moves: Iterable[Move],
+        tabu,
+        start,
+        current: Optional[TourEvaluation] = None,
+    ) -> Tuple[Tuple[Node, ...], Optional[TourEvaluation], Number]:
+        """
+        Neighbours of `solution` share prefix with `current` evaluation,
+        only legs after the first moved position are searched. Evaluation
+        of neighbour is abandoned once it cannot be better than the best one found
+        """
+        neighbours_start = time.perf_counter()
+        candidates = []
+        for move in moves:
+            solution_hash = self.hash_nodes(*move.nodes(solution))
             if solution_hash in tabu:
                 continue
-            path, cost = self.compute_solution_cost(solution, start)
             if len(tabu) > self.TABU_LEN:
                 tabu.pop(0)
             tabu.append(solution_hash)
+            candidates.append(move.apply(solution))
+        evaluation_start = time.perf_counter()
+        if self.workers > 1 and len(candidates) > 1:
+            best = self._pick_best_parallel(candidates, start, current)
+        else:
+            best = self._pick_best_sequential(candidates, start, current)
+        if self._stats is not None:
+            self._stats.iterations += 1
+            self._stats.candidates += len(candidates)
+            self._stats.add_phase("neighbours", evaluation_start - neighbours_start)
+            self._stats.add_phase("evaluation", time.perf_counter() - evaluation_start)
+        return best
+
+    def _pick_best_sequential(
+        self,
+        candidates: List[Tuple[Node, ...]],
+        start: Timestamp,
+        current: Optional[TourEvaluation],
+    ) -> Tuple[Tuple[Node, ...], Optional[TourEvaluation], Number]:
+        local_min = None
+        local_min_evaluation, local_min_cost = None, None
+        for solution in candidates:
+            bound = local_min_cost if local_min else float('inf')
+            evaluation = self.evaluate_solution(solution, start, current, bound)
+            cost = float('inf') if evaluation is None else evaluation.cost
             if not local_min or cost < local_min_cost:
                 local_min = solution
-                local_min_path = path
+                local_min_evaluation = evaluation
                 local_min_cost = cost
-        return local_min, local_min_path, local_min_cost
+        return local_min, local_min_evaluation, local_min_cost
+
+    def _pick_best_parallel(
+        self,
+        candidates: List[Tuple[Node, ...]],
+        start: Timestamp,
+        current: Optional[TourEvaluation],
+    ) -> Tuple[Tuple[Node, ...], Optional[TourEvaluation], Number]:
+        """
+        Candidates are split into consecutive chunks, the first cheapest one
+        of the first cheapest chunk is the one sequential pick_best returns.
+        Only stop ids are sent, the winner is evaluated again locally
+        """
+        pool = self._get_pool()
+        current_ids = None if current is None else _stop_ids(current.solution)
+        size = -(-len(candidates) // self.workers)
+        tasks = [
+            (start, current_ids, [
+                (position, _stop_ids(solution))
+                for position, solution in enumerate(candidates[first:first+size], first)
+            ])
+            for first in range(0, len(candidates), size)
+        ]
+        position, local_min_cost = min(pool.map(_evaluate_chunk, tasks), key=lambda result: result[1])
+        local_min = candidates[position]
+        local_min_evaluation = None
+        if local_min_cost != float('inf'):
+            local_min_evaluation = self.evaluate_solution(local_min, start, current)
+        return local_min, local_min_evaluation, local_min_cost
 
     def tabu_search_v2(self, start_node: Node, node_list: List[Node], start: Timestamp) -> Tuple[List[Edge], Tuple[Node, ...], Number]:
+        """
+        With stats_callback set, leg searches of the graph are
+        also passed to its own stats_callback, if any
+        """
+        if self.stats_callback is None:
+            return self._tabu_search_v2(start_node, node_list, start)
+        stats = self._stats = TabuStats(
+            "tabu_search_v2", start_node.id, len(node_list), start.time, self.criteria
+        )
+        graph_callback = self.graph.stats_callback
+
+        def record_search(search_stats: SearchStats) -> None:
+            stats.add_search(search_stats)
+            if graph_callback is not None:
+                graph_callback(search_stats)
+
+        self.graph.stats_callback = record_search
+        try:
+            result = self._tabu_search_v2(start_node, node_list, start)
+        finally:
+            self.graph.stats_callback = graph_callback
+            self._stats = None
+        stats.cost = result[2]
+        self.stats_callback(stats)
+        return result
+
+    def _tabu_search_v2(self, start_node: Node, node_list: List[Node], start: Timestamp) -> Tuple[List[Edge], Tuple[Node, ...], Number]:
         k = 0
         random.shuffle(node_list)
+        self.tour_nodes = [start_node]+node_list
         best_solution = tuple([start_node]+node_list+[start_node])
-        best_path, best_cost = self.compute_solution_cost(best_solution, start)
+        initial_start = time.perf_counter()
+        best_evaluation = self.evaluate_solution(best_solution, start)
+        if self._stats is not None:
+            self._stats.add_phase("initial", time.perf_counter() - initial_start)
+        best_cost = float('inf') if best_evaluation is None else best_evaluation.cost
         tabu = []
         local_min = best_solution
-        local_min_path, local_min_cost = self.compute_solution_cost(local_min, start) 
+        local_min_evaluation, local_min_cost = best_evaluation, best_cost
         while k < self.STEP_LIMIT:
             for _ in range(self.OPERATION_LIMIT):
-                solutions = self.get_neighbours_v2_1(local_min)
-                s_prim, s_prim_path, s_prim_cost = self.pick_best(solutions, tabu, start)
+                moves = self.get_neighbours_v2_1(local_min)
+                s_prim, s_prim_evaluation, s_prim_cost = self.pick_best(local_min, moves, tabu, start, local_min_evaluation)
                 if s_prim and s_prim_cost <= local_min_cost:
                     local_min = s_prim
-                    local_min_path = s_prim_path
+                    local_min_evaluation = s_prim_evaluation
                     local_min_cost = s_prim_cost
 
             if local_min_cost <= best_cost:
                 best_solution = local_min
-                best_path = local_min_path
+                best_evaluation = local_min_evaluation
                 best_cost = local_min_cost
             k += 1
+        best_path = None if best_evaluation is None else best_evaluation.path
         return best_path, best_solution, best_cost
     
 
+def _can_fork() -> bool:
+    return "fork" in multiprocessing.get_all_start_methods()
+
+
+def _stop_ids(solution: Tuple[Node, ...]) -> Tuple[int, ...]:
+    return tuple(node.id for node in solution)
+
+
+_worker_tabu: Optional[Tabu] = None
+_worker_current: Optional[TourEvaluation] = None
+
+
+def _init_worker(graph: Union[Graph, str], criteria: str, graph_kwargs: Dict[str, Any]) -> None:
+    global _worker_tabu
+    if not isinstance(graph, Graph):
+        graph = Graph.load(graph, **graph_kwargs)
+    _worker_tabu = Tabu(graph, criteria)
+
+
+def _evaluate_chunk(
+    task: Tuple[Timestamp, Optional[Tuple[int, ...]], List[Tuple[int, Tuple[int, ...]]]]
+) -> Tuple[int, Number]:
+    """(position, cost) of the first cheapest candidate, evaluated like in Tabu.pick_best"""
+    global _worker_current
+    start, current_ids, candidates = task
+    nodes = _worker_tabu.graph.nodes
+    to_solution = lambda ids: tuple(nodes[stop_id] for stop_id in ids)
+    _worker_tabu.tour_nodes = list(to_solution(candidates[0][1][:-1]))
+    if current_ids is None:
+        _worker_current = None
+    elif (
+        _worker_current is None
+        or _worker_current.arrivals[0] != start
+        or _stop_ids(_worker_current.solution) != current_ids
+    ):
+        _worker_current = _worker_tabu.evaluate_solution(to_solution(current_ids), start)
+    best_position, best_cost = None, float('inf')
+    for position, ids in candidates:
+        evaluation = _worker_tabu.evaluate_solution(to_solution(ids), start, _worker_current, best_cost)
+        cost = float('inf') if evaluation is None else evaluation.cost
+        if best_position is None or cost < best_cost:
+            best_position, best_cost = position, cost
+    return best_position, best_cost
+
 
 if __name__ == '__main__':
     graph = Graph("connection_graph.csv")
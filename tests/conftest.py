@@ -0,0 +1,42 @@
+import random
+from typing import List, Tuple
+import pytest
+from graph import Graph, Node, Timestamp
+from timetable_generator import GeneratorConfig, generate
+
+CONFIG = GeneratorConfig(stops=40, lines=8, trips_per_day=16, stops_per_line=(5, 12), seed=7)
+
+
+@pytest.fixture(scope="session")
+def timetable_csv(tmp_path_factory) -> str:
+    path = str(tmp_path_factory.mktemp("timetable") / "connection_graph.csv")
+    generate(path, CONFIG)
+    return path
+
+
+@pytest.fixture(scope="session")
+def classic_graph(timetable_csv) -> Graph:
+    return Graph(timetable_csv)
+
+
+@pytest.fixture(scope="session")
+def compact_graph(timetable_csv) -> Graph:
+    return Graph(timetable_csv, compact=True)
+
+
+def random_queries(graph: Graph, count: int, seed: int = 0) -> List[Tuple[Node, Node, Timestamp]]:
+    rng = random.Random(seed)
+    return [
+        (*rng.sample(graph.nodes, 2), Timestamp.from_seconds(rng.randint(5 * 3600, 21 * 3600)))
+        for _ in range(count)
+    ]
+
+
+def path_summary(path):
+    """Comparable form of path, Edge objects differ between graphs"""
+    if path is None:
+        return None
+    return [
+        (edge.departure_time.time, edge.arrival_time.time, edge.dest.stop_name, edge.line)
+        for edge in path
+    ]
@@ -0,0 +1,57 @@
+import io
+import json
+import pytest
+import batch
+from graph import Graph
+from tests.conftest import random_queries
+
+
+@pytest.fixture
+def batch_graph(timetable_csv, compact_graph, monkeypatch):
+    graph = Graph(timetable_csv, compact=True, timetable=compact_graph.timetable)
+    monkeypatch.setattr(batch, "_graph", graph)
+    return graph
+
+
+def records(graph, count):
+    return [
+        f"{start.stop_name};{end.stop_name};{start_time.time_str};{'tp'[index % 2]}"
+        for index, (start, end, start_time) in enumerate(random_queries(graph, count, seed=25))
+    ]
+
+
+def run(lines, **kwargs):
+    output = io.StringIO()
+    batch.run_batch(lines, output, **kwargs)
+    return [json.loads(line) for line in output.getvalue().splitlines()]
+
+
+@pytest.mark.parametrize("engine", batch.ENGINES)
+def test_parallel_batch_keeps_input_order(batch_graph, engine):
+    lines = records(batch_graph, 40)
+    if engine == "csa":
+        lines = [line[:-1] + "t" for line in lines]
+    sequential = run(lines, engine=engine)
+    parallel = run(lines, engine=engine, workers=2, window=3)
+    assert [result["query"] for result in parallel] == lines
+    for result in parallel + sequential:
+        del result["latency"]
+    assert parallel == sequential
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_bad_record_gets_error(batch_graph, workers):
+    good = records(batch_graph, 2)
+    lines = [good[0], "only;three;fields", "Nowhere;Stop 1;08:00;t", f"{good[1][:-1]}x", good[1]]
+    results = run(lines, workers=workers)
+    assert [result["query"] for result in results] == lines
+    assert ["error" in result for result in results] == [False, True, True, True, False]
+    assert "path" in results[-1]
+
+
+def test_stats_keep_graph_callback(batch_graph):
+    received = []
+    batch_graph.stats_callback = received.append
+    result, = run(records(batch_graph, 1), stats=True)
+    assert batch_graph.stats_callback == received.append
+    assert len(received) == len(result["stats"]) == 1
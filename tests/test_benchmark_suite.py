@@ -0,0 +1,67 @@
+import json
+import os
+import sys
+import pytest
+import benchmark_suite
+from benchmark_suite import BenchmarkConfig, compare, load_benchmarks
+from graph import Graph
+
+META = {"data": "connection_graph.csv", "data_size": 1, "seed": 255, "queries": 30, "compact": False}
+
+
+def results(**p50):
+    return {"meta": META, "benchmarks": {name: {"p50": value} for name, value in p50.items()}}
+
+
+def test_compare_finds_regressions_above_threshold(capsys):
+    baseline = results(slower=1.0, same=1.0, faster=1.0, within=1.0)
+    current = results(slower=1.2, same=1.0, faster=0.5, within=1.05)
+    assert compare(baseline, current, 0.1, "p50") == ["slower"]
+
+
+def test_compare_skips_missing_benchmarks(capsys):
+    baseline = results(removed=1.0, kept=1.0)
+    current = results(kept=1.0, added=5.0)
+    assert compare(baseline, current, 0.1, "p50") == []
+    assert "removed" in capsys.readouterr().out
+
+
+def test_compare_zero_baseline_is_not_regression(capsys):
+    assert compare(results(instant=0.0), results(instant=1.0), 0.1, "p50") == []
+
+
+def test_main_exits_with_error_on_regression(tmp_path, monkeypatch, capsys):
+    paths = []
+    for name, value in (("baseline", 1.0), ("current", 2.0)):
+        path = tmp_path / f"{name}.json"
+        path.write_text(json.dumps(results(search=value)), encoding="utf-8")
+        paths.append(str(path))
+    monkeypatch.setattr(sys, "argv", ["benchmark_suite", "compare", *paths])
+    with pytest.raises(SystemExit) as error:
+        benchmark_suite.main()
+    assert error.value.code == 1
+    monkeypatch.setattr(sys, "argv", ["benchmark_suite", "compare", *paths, "-t", "1.5"])
+    benchmark_suite.main()
+
+
+def test_load_benchmarks_leave_data_directory_untouched(timetable_csv, tmp_path, monkeypatch):
+    data = tmp_path / "data"
+    data.mkdir()
+    csv = data / "connection_graph.csv"
+    csv.write_bytes(open(timetable_csv, "rb").read())
+    snapshots = []
+    save_snapshot = Graph.save_snapshot
+
+    def record_snapshot(graph, path):
+        snapshots.append(os.path.dirname(os.path.abspath(path)))
+        save_snapshot(graph, path)
+
+    monkeypatch.setattr(Graph, "save_snapshot", record_snapshot)
+    data.chmod(0o555)
+    try:
+        timings = load_benchmarks(BenchmarkConfig(data=str(csv), load_repeat=1))
+    finally:
+        data.chmod(0o755)
+    assert set(timings) == {"load_csv", "load_snapshot"}
+    assert snapshots and str(data) not in snapshots
+    assert os.listdir(data) == ["connection_graph.csv"]
@@ -0,0 +1,61 @@
+import pytest
+from graph import Graph
+from tests.conftest import path_summary, random_queries
+
+
+def test_compact_graph_has_no_edges(compact_graph):
+    assert all(not node.neighbours for node in compact_graph.nodes)
+
+
+@pytest.mark.parametrize("search", ["dijkstra", "dijkstra_py_prority_que", "dijkstra_heapq"])
+def test_dijkstra_same_on_compact_graph(classic_graph, compact_graph, search):
+    for start, end, start_time in random_queries(classic_graph, 25):
+        classic = getattr(classic_graph, search)(start, end, start_time)
+        compact = getattr(compact_graph, search)(
+            compact_graph.nodes[start.id], compact_graph.nodes[end.id], start_time
+        )
+        assert path_summary(compact[0]) == path_summary(classic[0])
+        assert compact[1:] == classic[1:]
+
+
+def test_dijkstra_variants_agree(classic_graph):
+    found = 0
+    for start, end, start_time in random_queries(classic_graph, 25, seed=1):
+        _, _, cost = classic_graph.dijkstra_heapq(start, end, start_time)
+        path, _ = classic_graph.dijkstra(start, end, start_time)
+        _, _, queue_cost = classic_graph.dijkstra_py_prority_que(start, end, start_time)
+        assert queue_cost == cost
+        if cost is not None:
+            found += 1
+            assert path[-1].dest is end
+            assert path[0].departure_time.time >= start_time.time
+            assert all(a.arrival_time <= b.departure_time for a, b in zip(path, path[1:]))
+    assert found
+
+
+def test_departures_from_skips_only_departed_rows(compact_graph):
+    timetable = compact_graph.timetable
+    for stop in range(timetable.stop_count):
+        first, last = timetable.offsets[stop], timetable.offsets[stop + 1]
+        for time in (0, 8 * 3600, 12 * 3600 + 1, 30 * 3600):
+            rows = compact_graph.departures_from(stop, time)
+            expected = [row for row in range(first, last) if timetable.departure[row] >= time]
+            assert list(rows) == expected
+
+
+def test_next_departure_table_keeps_costs(timetable_csv, compact_graph):
+    graph = Graph(timetable_csv, compact=True, next_departure_table=True)
+    for start, end, start_time in random_queries(compact_graph, 40, seed=2):
+        _, _, cost = compact_graph.dijkstra_heapq(start, end, start_time)
+        _, _, table_cost = graph.dijkstra_heapq(
+            graph.nodes[start.id], graph.nodes[end.id], start_time
+        )
+        assert table_cost == cost
+
+
+def test_labels_do_not_leak_between_searches(timetable_csv, compact_graph):
+    queries = random_queries(compact_graph, 30, seed=23)
+    results = [compact_graph.a_star(*query, criteria="hops")[1:] for query in queries]
+    for query, result in zip(queries, results):
+        fresh = Graph(timetable_csv, compact=True, timetable=compact_graph.timetable)
+        assert fresh.a_star(*query, criteria="hops")[1:] == result
@@ -0,0 +1,34 @@
+import itertools
+import pytest
+from held_karp import HeldKarp
+from tabu import Tabu
+from tests.test_tabu import tour
+
+
+def brute_force(graph, start_node, node_list, start_time):
+    tabu = Tabu(graph, 'time')
+    tabu.tour_nodes = [start_node, *node_list]
+    costs = [
+        tabu.compute_solution_cost([start_node, *order, start_node], start_time)[1]
+        for order in itertools.permutations(node_list)
+    ]
+    return min(costs)
+
+
+@pytest.mark.parametrize("stops", [0, 1, 4])
+def test_held_karp_matches_brute_force(compact_graph, stops):
+    for seed in range(4):
+        solution, start_time = tour(compact_graph, seed, stops)
+        start_node, node_list = solution[0], list(solution[1:-1])
+        path, order, cost = HeldKarp(compact_graph).tabu_search_v2(start_node, node_list, start_time)
+        assert cost == brute_force(compact_graph, start_node, node_list, start_time)
+        if path:
+            assert order[0] is order[-1] is start_node
+            assert sorted(node.id for node in order[1:-1]) == sorted(node.id for node in node_list)
+            assert path[-1].arrival_time.time - start_time.time == cost
+
+
+def test_held_karp_rejects_hops(compact_graph):
+    solution, start_time = tour(compact_graph, 0, 2)
+    with pytest.raises(ValueError):
+        HeldKarp(compact_graph, 'hops').tabu_search_v2(solution[0], list(solution[1:-1]), start_time)
@@ -0,0 +1,67 @@
+import os
+import shutil
+import pytest
+from graph import LANDMARKS_SUFFIX, Graph
+from tests.conftest import random_queries
+
+
+@pytest.fixture(scope="module")
+def landmark_graphs(timetable_csv, compact_graph):
+    """Own graphs, landmarks of session graphs would leak into other tests"""
+    graphs = tuple(
+        Graph(timetable_csv, compact=compact, timetable=compact_graph.timetable)
+        for compact in (False, True)
+    )
+    for graph in graphs:
+        graph.precompute_landmarks(count=6)
+    return graphs
+
+
+def test_lower_bounds_are_admissible(landmark_graphs):
+    _, graph = landmark_graphs
+    for start, end, start_time in random_queries(graph, 30, seed=10):
+        _, _, cost = graph.connection_scan(start, end, start_time)
+        bound = graph.landmark_bounds(end)[start.id]
+        assert cost is None or bound <= cost
+
+
+def test_a_star_with_landmarks_is_exact(landmark_graphs):
+    for graph in landmark_graphs:
+        found = 0
+        for start, end, start_time in random_queries(graph, 30, seed=11):
+            # dijkstra_heapq cost is arrival time at end_node
+            _, _, arrival = graph.dijkstra_heapq(start, end, start_time)
+            path, _, cost = graph.a_star(start, end, start_time, criteria="time", landmarks=True)
+            if arrival is None:
+                assert cost is None
+                continue
+            found += 1
+            assert cost == arrival - start_time.time
+            assert path[-1].arrival_time.time == arrival
+        assert found
+
+
+def test_graph_load_saves_computed_landmarks(timetable_csv, tmp_path):
+    csv = str(tmp_path / "connection_graph.csv")
+    shutil.copy(timetable_csv, csv)
+    graph = Graph.load(csv)
+    assert graph.landmarks is None
+    graph.landmark_bounds(graph.nodes[0])
+    assert os.path.exists(csv + LANDMARKS_SUFFIX)
+
+    loaded = Graph.load(csv)
+    assert loaded.landmarks is not None
+    assert (loaded.landmarks.stops == graph.landmarks.stops).all()
+
+
+def test_landmark_search_skips_distance_estimate(landmark_graphs, monkeypatch):
+    for graph in landmark_graphs:
+        calls = []
+        monkeypatch.setattr(graph, "distances_to", lambda node: calls.append(node))
+        start, end, start_time = random_queries(graph, 1, seed=12)[0]
+        graph.a_star(start, end, start_time, criteria="time", landmarks=True)
+        assert not calls
+
+
+def test_session_graphs_have_no_landmarks(landmark_graphs, classic_graph, compact_graph):
+    assert classic_graph.landmarks is None and compact_graph.landmarks is None
@@ -0,0 +1,55 @@
+import random
+from graph import Timestamp
+from leg_cache import LegCache
+from tabu import Tabu
+from tests.conftest import random_queries
+
+
+def test_interval_lookup():
+    cache = LegCache()
+    cache.put("leg", 100, 200, ([], 1))
+    cache.put("leg", 300, 400, ([], 2))
+    assert cache.get("leg", 100) is None
+    assert cache.get("leg", 150) == ([], 1)
+    assert cache.get("leg", 200) == ([], 1)
+    assert cache.get("leg", 250) is None
+    assert cache.get("leg", 400) == ([], 2)
+    assert cache.get("other", 150) is None
+    assert (cache.hits, cache.misses) == (3, 3)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = LegCache(max_entries=2)
+    cache.put("a", 0, 10, ([], 1))
+    cache.put("b", 0, 10, ([], 2))
+    cache.get("a", 5)
+    cache.put("c", 0, 10, ([], 3))
+    assert cache.get("b", 5) is None
+    assert cache.get("a", 5) == ([], 1)
+    assert cache.get("c", 5) == ([], 3)
+    assert cache.evictions == 1 and len(cache) == 2
+
+
+def test_cached_leg_is_reused_within_its_interval(compact_graph):
+    """
+    No departure from start in (low, t) makes search from there the same search,
+    FIFO makes time journey departing at d earliest arrival for every start up to d
+    """
+    rng = random.Random(15)
+    timetable = compact_graph.timetable
+    for criteria in ('time', 'hops'):
+        tabu = Tabu(compact_graph, criteria)
+        for start, end, start_time in random_queries(compact_graph, 30, seed=15):
+            tabu.tour_nodes = [start, end]
+            path, _ = tabu.get_partial_solution(start, end, start_time)
+            if not path:
+                continue
+            low = timetable.previous_departure(start.id, start_time.time)
+            high = path[0].departure_time.time if criteria == 'time' else start_time.time
+            later = Timestamp.from_seconds(rng.randint(low + 1, high))
+            hits = tabu.leg_cache.hits
+            _, cost = tabu.get_partial_solution(start, end, later)
+            assert tabu.leg_cache.hits == hits + 1
+            fresh = Tabu(compact_graph, criteria)
+            fresh.tour_nodes = [start, end]
+            assert cost == fresh.get_partial_solution(start, end, later)[1]
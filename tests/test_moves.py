@@ -0,0 +1,43 @@
+import pytest
+from graph import Node
+from tabu import Move, Tabu
+
+
+def solution(interior):
+    nodes = [Node(f"Stop {i}", 0.0, 0.0, [], i) for i in range(interior + 1)]
+    return tuple(nodes + nodes[:1])
+
+
+@pytest.mark.parametrize("interior", range(0, 8))
+@pytest.mark.parametrize("kind", Tabu.MOVE_KINDS)
+def test_decoded_moves_are_distinct_neighbours(kind, interior):
+    tabu = Tabu(None, moves=Tabu.MOVE_KINDS)
+    tour = solution(interior)
+    count = tabu.count_moves(kind, interior)
+    moves = [tabu.decode_move(kind, index, interior) for index in range(count)]
+    assert len(set(moves)) == count
+    neighbours = {move.apply(tour) for move in moves}
+    for neighbour in neighbours:
+        assert neighbour[0] is neighbour[-1] is tour[0]
+        assert sorted(node.id for node in neighbour) == sorted(node.id for node in tour)
+        assert neighbour != tour
+    if kind == '2-opt':
+        # swaps (i, j) and (j, i) or or-opt moves of adjacent stops may give equal tours
+        assert len(neighbours) == count
+
+
+@pytest.mark.parametrize("interior", range(2, 8))
+def test_swap_numbering_matches_full_neighbourhood(interior):
+    tabu = Tabu(None)
+    tour = solution(interior)
+    count = tabu.count_moves('swap', interior)
+    assert [tabu.decode_move('swap', index, interior) for index in range(count)] == list(
+        tabu.get_neighbours_v2(tour)
+    )
+
+
+def test_or_opt_moves_segment():
+    tour = solution(5)
+    moved = Move('or-opt', 1, 4, 2).apply(tour)
+    assert [node.id for node in moved] == [0, 3, 4, 5, 1, 2, 0]
+    assert [node.id for node in Move('2-opt', 2, 4).apply(tour)] == [0, 1, 4, 3, 2, 5, 0]
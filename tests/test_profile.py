@@ -0,0 +1,97 @@
+import pytest
+from graph import Graph, Timestamp
+from tests.conftest import random_queries
+
+
+def brute_force_profile(graph, start, end, window_start, window_end):
+    """
+    Earliest arrival after every in-window departure from start, later
+    transfers may pass through start at any time, then pareto filtered
+    """
+    timetable = graph.timetable
+    timetable.build_scan_arrays()
+    connections = list(zip(
+        timetable.scan_departure.tolist(), timetable.scan_arrival.tolist(),
+        timetable.scan_start.tolist(), timetable.scan_dest.tolist(),
+    ))
+    candidates = []
+    for departure, arrival, source, dest in connections:
+        if source != start or not window_start <= departure <= window_end:
+            continue
+        earliest = {dest: arrival}
+        for next_departure, next_arrival, next_source, next_dest in connections:
+            if earliest.get(next_source, float("inf")) <= next_departure:
+                earliest[next_dest] = min(earliest.get(next_dest, float("inf")), next_arrival)
+        if end in earliest:
+            candidates.append((departure, earliest[end]))
+    pareto = []
+    for departure, arrival in sorted(candidates, key=lambda pair: (-pair[0], pair[1])):
+        if not pareto or arrival < pareto[-1][1]:
+            if pareto and pareto[-1][0] == departure:
+                continue
+            pareto.append((departure, arrival))
+    return pareto[::-1]
+
+
+def profile_summary(journeys):
+    return [(path[0].departure_time.time, path[-1].arrival_time.time) for path in journeys]
+
+
+def check_profile(graph, start, end, window_start, window_end):
+    journeys = graph.profile_query(
+        start, end, Timestamp.from_seconds(window_start), Timestamp.from_seconds(window_end)
+    )
+    assert profile_summary(journeys) == brute_force_profile(
+        graph, start.id, end.id, window_start, window_end
+    )
+    for path in journeys:
+        assert path[0].departure_time.time >= window_start
+        assert path[-1].dest is end
+        assert all(a.arrival_time <= b.departure_time for a, b in zip(path, path[1:]))
+    return journeys
+
+
+@pytest.mark.parametrize("window", [1800, 3 * 3600])
+def test_profile_matches_brute_force(compact_graph, window):
+    found = 0
+    for start, end, start_time in random_queries(compact_graph, 40, seed=7):
+        found += len(check_profile(
+            compact_graph, start, end, start_time.time, start_time.time + window
+        ))
+    assert found
+
+
+def small_graph(tmp_path, rows):
+    path = tmp_path / "connection_graph.csv"
+    header = "company,line,departure_time,arrival_time,start_stop,end_stop," \
+             "start_stop_lat,start_stop_lon,end_stop_lat,end_stop_lon\n"
+    path.write_text(
+        header + "".join(",".join(row) + ",51.1,17.0,51.1,17.0\n" for row in rows),
+        encoding="utf-8",
+    )
+    return Graph(str(path), compact=True)
+
+
+@pytest.mark.parametrize("start, end, window_start, window_end", [
+    ("A", "C", 0, 1000),
+    ("A", "C", 0, 150),
+])
+def test_profile_keeps_journeys_beaten_after_window(tmp_path, start, end, window_start, window_end):
+    # slow trip inside the window, fast one right after it
+    graph = small_graph(tmp_path, [
+        ("MPK", "1", "00:01:40", "00:16:40", "A", "B"),
+        ("MPK", "1", "00:16:40", "00:33:20", "B", "C"),
+        ("MPK", "2", "00:05:00", "00:08:20", "A", "C"),
+    ])
+    check_profile(graph, graph.graph[start], graph.graph[end], window_start, window_end)
+
+
+def test_profile_transfers_through_start_after_window(tmp_path):
+    # the only way to C is back through A after the window
+    graph = small_graph(tmp_path, [
+        ("MPK", "1", "00:01:40", "00:03:20", "A", "B"),
+        ("MPK", "2", "00:05:00", "00:06:40", "B", "A"),
+        ("MPK", "3", "00:10:00", "00:11:40", "A", "C"),
+    ])
+    journeys = check_profile(graph, graph.graph["A"], graph.graph["C"], 0, 200)
+    assert profile_summary(journeys) == [(100, 700)]
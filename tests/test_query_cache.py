@@ -0,0 +1,43 @@
+import random
+import pytest
+from graph import Graph, Timestamp
+from query_cache import QueryCache
+from tests.conftest import path_summary, random_queries
+
+
+def test_budget_evicts_least_recently_used():
+    cache = QueryCache(max_bytes=3 * QueryCache.ENTRY_BYTES)
+    for key in "abc":
+        cache.put(key, (None, None, None, 0))
+    cache.get("a")
+    cache.put("d", (None, None, None, 0))
+    assert cache.get("b") is None
+    assert all(cache.get(key) is not None for key in "acd")
+    assert cache.bytes == 3 * QueryCache.ENTRY_BYTES and cache.evictions == 1
+
+
+def test_entry_over_budget_is_not_cached():
+    cache = QueryCache(max_bytes=QueryCache.ENTRY_BYTES)
+    cache.put("long", ([object()] * 3, 1, 1, 0))
+    assert len(cache) == 0 and cache.bytes == 0
+
+
+@pytest.mark.parametrize("criteria", ["time", "hops"])
+def test_cached_a_star_matches_search(timetable_csv, classic_graph, criteria):
+    graph = Graph(timetable_csv, query_cache=QueryCache())
+    rng = random.Random(16)
+    timetable = graph.timetable
+    for start, end, start_time in random_queries(classic_graph, 30, seed=16):
+        # the same first departure is caught from any time up to it
+        first = timetable.first_departure(start.id, start_time.time)
+        if first < timetable.offsets[start.id + 1]:
+            later = Timestamp.from_seconds(rng.randint(start_time.time, int(timetable.departure[first])))
+        else:
+            later = start_time
+        for query_time in (start_time, later):
+            path, visited, cost = graph.a_star(
+                graph.nodes[start.id], graph.nodes[end.id], query_time, criteria
+            )
+            expected = classic_graph.a_star(start, end, query_time, criteria)
+            assert (path_summary(path), visited, cost) == (path_summary(expected[0]), *expected[1:])
+    assert graph.query_cache.hits
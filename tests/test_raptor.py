@@ -0,0 +1,48 @@
+from raptor import infer_trips
+from tests.conftest import random_queries
+
+
+def pareto_by_rounds(timetable, trips, start, end, start_time, rounds):
+    """(arrival, trips) whenever one more trip improves arrival at end"""
+    inf = float("inf")
+    start_stop = timetable.start_stops()
+    stops = [[start_stop[rows[0]]] + [timetable.dest[row] for row in rows] for rows in trips]
+    previous = [inf] * timetable.stop_count
+    previous[start] = start_time
+    pareto = []
+    for k in range(1, rounds + 1):
+        current = previous[:]
+        for rows, trip_stops in zip(trips, stops):
+            boarded = False
+            for j, row in enumerate(rows):
+                boarded = boarded or previous[trip_stops[j]] <= timetable.departure[row]
+                if boarded:
+                    current[trip_stops[j + 1]] = min(current[trip_stops[j + 1]], timetable.arrival[row])
+        if current[end] < previous[end]:
+            pareto.append((current[end], k))
+        previous = current
+    return pareto
+
+
+def test_raptor_pareto_set(compact_graph):
+    timetable = compact_graph.timetable
+    trips = infer_trips(timetable)
+    found = 0
+    for start, end, start_time in random_queries(compact_graph, 30, seed=5):
+        journeys = compact_graph.raptor(start, end, start_time, max_transfers=4)
+        expected = pareto_by_rounds(timetable, trips, start.id, end.id, start_time.time, 5)
+        assert [(start_time.time + cost, transfers + 1) for _, transfers, cost in journeys] == expected
+        for path, _, cost in journeys:
+            found += 1
+            assert path[0].departure_time.time >= start_time.time
+            assert path[-1].dest is end
+            assert path[-1].arrival_time.time - start_time.time == cost
+            assert all(a.arrival_time <= b.departure_time for a, b in zip(path, path[1:]))
+    assert found
+
+
+def test_raptor_fastest_matches_connection_scan(compact_graph):
+    for start, end, start_time in random_queries(compact_graph, 30, seed=6):
+        journeys = compact_graph.raptor(start, end, start_time, max_transfers=20)
+        _, _, cost = compact_graph.connection_scan(start, end, start_time)
+        assert (journeys[-1][2] if journeys else None) == cost
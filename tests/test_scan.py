@@ -0,0 +1,71 @@
+import numpy as np
+from graph import Timestamp
+from tests.conftest import random_queries
+
+
+def check_path(path, end, start_time):
+    assert path[0].departure_time.time >= start_time.time
+    assert path[-1].dest.id == end.id
+    assert all(a.arrival_time <= b.departure_time for a, b in zip(path, path[1:]))
+
+
+def test_connection_scan_matches_dijkstra(compact_graph):
+    found = 0
+    for start, end, start_time in random_queries(compact_graph, 60, seed=3):
+        # dijkstra_heapq cost is arrival time at end_node
+        _, _, arrival = compact_graph.dijkstra_heapq(start, end, start_time)
+        path, _, cost = compact_graph.connection_scan(start, end, start_time)
+        if arrival is None:
+            assert cost is None
+            continue
+        found += 1
+        assert cost == arrival - start_time.time
+        check_path(path, end, start_time)
+        assert path[-1].arrival_time.time == arrival
+    assert found
+
+
+
+def test_one_to_many_matches_connection_scan(compact_graph):
+    for start, _, start_time in random_queries(compact_graph, 10, seed=8):
+        targets = [node for node in compact_graph.nodes[:15] if node is not start]
+        paths = compact_graph.one_to_many(start, start_time, targets)
+        for end in targets:
+            _, _, cost = compact_graph.connection_scan(start, end, start_time)
+            path = paths[end]
+            if cost is None:
+                assert path is None
+                continue
+            check_path(path, end, start_time)
+            assert path[-1].arrival_time.time - start_time.time == cost
+
+
+def test_earliest_arrival_tree_horizon(compact_graph):
+    max_duration = 2 * 3600
+    for start, _, start_time in random_queries(compact_graph, 10, seed=9):
+        tree = compact_graph.earliest_arrival_tree(start, start_time, max_duration)
+        full = compact_graph.earliest_arrival_tree(start, start_time)
+        within = full.arrival <= start_time.time + max_duration
+        assert (tree.arrival[within] == full.arrival[within]).all()
+        assert tree.reachable().tolist() == np.flatnonzero(within).tolist()
+
+
+def test_latest_departure_matches_forward_search(compact_graph):
+    found = 0
+    for start, end, arrive_by in random_queries(compact_graph, 40, seed=20):
+        path, _, cost = compact_graph.latest_departure(start, end, arrive_by)
+        # forward search from any time up to the departure still arrives in time
+        _, _, forward_cost = compact_graph.connection_scan(start, end, Timestamp.from_seconds(0))
+        if cost is None:
+            assert forward_cost is None or forward_cost > arrive_by.time
+            continue
+        found += 1
+        departure = arrive_by.time - cost
+        on_time = compact_graph.connection_scan(start, end, Timestamp.from_seconds(departure))[2]
+        assert on_time is not None and departure + on_time <= arrive_by.time
+        late = compact_graph.connection_scan(start, end, Timestamp.from_seconds(departure + 1))[2]
+        assert late is None or departure + 1 + late > arrive_by.time
+        assert path[0].departure_time.time == departure
+        assert path[-1].dest is end and path[-1].arrival_time <= arrive_by
+        assert all(a.arrival_time <= b.departure_time for a, b in zip(path, path[1:]))
+    assert found
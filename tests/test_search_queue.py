@@ -0,0 +1,77 @@
+import pytest
+from search_queue import QUEUES, BucketQueue, create_queue
+from tests.conftest import random_queries
+
+MONOTONE_KINDS = sorted(QUEUES)
+GENERAL_KINDS = sorted(kind for kind, queue_class in QUEUES.items() if not queue_class.MONOTONE)
+
+
+@pytest.mark.parametrize("kind", MONOTONE_KINDS)
+def test_queue_pops_in_priority_order(kind):
+    queue = create_queue(kind, monotone=True)
+    for priority, item in [(5, "a"), (3, "b"), (5, "c"), (9, "d")]:
+        queue.push(priority, None, item)
+    assert [queue.pop()[0] for _ in range(2)] == [3, 5]
+    queue.push(7, None, "e")
+    assert [queue.pop()[0] for _ in range(3)] == [5, 7, 9]
+    assert not queue
+
+
+def test_bucket_queue_is_fifo_within_priority():
+    queue = BucketQueue()
+    for item in "abc":
+        queue.push(10, None, item)
+    assert queue.pop()[2] == "a"
+    queue.push(10, None, "d")
+    assert [queue.pop()[2] for _ in range(3)] == ["b", "c", "d"]
+
+
+def test_bucket_queue_rejects_non_monotone_use():
+    queue = BucketQueue()
+    queue.push(10, None, "a")
+    queue.push(12, None, "b")
+    queue.pop()
+    queue.pop()
+    with pytest.raises(ValueError):
+        queue.push(11, None, "c")
+    with pytest.raises(TypeError):
+        float_queue = BucketQueue()
+        float_queue.push(1, None, "d")
+        float_queue.push(2.5, None, "e")
+    with pytest.raises(ValueError):
+        create_queue("bucket")
+    with pytest.raises(ValueError):
+        create_queue("fibonacci")
+
+
+@pytest.mark.parametrize("kind", MONOTONE_KINDS)
+def test_dijkstra_costs_equal_for_every_queue(classic_graph, compact_graph, kind):
+    for start, end, start_time in random_queries(classic_graph, 20, seed=17):
+        expected = classic_graph.dijkstra_heapq(start, end, start_time)[2]
+        assert classic_graph.dijkstra_heapq(start, end, start_time, kind)[2] == expected
+        assert classic_graph.dijkstra_py_prority_que(start, end, start_time, kind)[2] == expected
+        path, _ = classic_graph.dijkstra(start, end, start_time, kind)
+        assert (path[-1].arrival_time.time if path else None) == expected
+        compact_start, compact_end = compact_graph.nodes[start.id], compact_graph.nodes[end.id]
+        assert compact_graph.dijkstra_heapq(compact_start, compact_end, start_time, kind)[2] == expected
+
+
+@pytest.mark.parametrize("kind", MONOTONE_KINDS)
+def test_latest_departure_costs_equal_for_every_queue(compact_graph, kind):
+    for start, end, arrive_by in random_queries(compact_graph, 20, seed=18):
+        expected = compact_graph.latest_departure(start, end, arrive_by)[2]
+        assert compact_graph.latest_departure(start, end, arrive_by, kind)[2] == expected
+
+
+@pytest.mark.parametrize("kind", GENERAL_KINDS)
+def test_a_star_costs_equal_for_general_queues(classic_graph, kind):
+    for start, end, start_time in random_queries(classic_graph, 20, seed=19):
+        for criteria in ("time", "hops"):
+            expected = classic_graph.a_star(start, end, start_time, criteria)[2]
+            assert classic_graph.a_star(start, end, start_time, criteria, queue=kind)[2] == expected
+
+
+def test_a_star_rejects_bucket_queue(classic_graph):
+    start, end, start_time = random_queries(classic_graph, 1)[0]
+    with pytest.raises(ValueError):
+        classic_graph.a_star(start, end, start_time, queue="bucket")
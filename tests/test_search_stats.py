@@ -0,0 +1,67 @@
+import random
+import pytest
+from graph import Graph, Timestamp
+from search_stats import StatsLog
+from tabu import Tabu
+from tests.conftest import random_queries
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_search_stats_are_consistent(timetable_csv, compact):
+    log = StatsLog()
+    graph = Graph(timetable_csv, compact=compact, stats_callback=log)
+    for start, end, start_time in random_queries(graph, 10, seed=21):
+        results = [
+            graph.dijkstra_heapq(start, end, start_time),
+            graph.a_star(start, end, start_time),
+            graph.latest_departure(start, end, start_time),
+        ]
+        for result, stats in zip(results, list(log.records)[-3:]):
+            assert stats.found == (result[0] is not None)
+            if stats.found:
+                assert stats.visited == result[1]
+            assert stats.pushes == stats.edges_relaxed + 1
+            assert 0 <= stats.stale_pops <= stats.pops <= stats.pushes
+            assert stats.edges_relaxed <= stats.edges_scanned
+            assert set(stats.phases) == {"setup", "search", "path"}
+    assert len(log) == 30
+    assert log.worst(1)[0].edges_scanned == max(stats.edges_scanned for stats in log.records)
+
+
+def test_scan_stats_are_consistent(compact_graph):
+    log = StatsLog()
+    compact_graph.stats_callback = log
+    try:
+        for start, end, start_time in random_queries(compact_graph, 10, seed=23):
+            path, visited, _ = compact_graph.connection_scan(start, end, start_time)
+            tree = compact_graph.earliest_arrival_tree(start, start_time, targets=[end])
+            scan, tree_scan = list(log.records)[-2:]
+            assert scan.algorithm == "connection_scan"
+            assert scan.found == (path is not None)
+            if scan.found:
+                assert scan.visited == visited
+            assert tree_scan.algorithm == "earliest_arrival_tree"
+            assert tree_scan.end == -1 and tree_scan.found == scan.found
+            assert tree_scan.visited == len(tree.reachable())
+            for stats in (scan, tree_scan):
+                assert stats.pushes == stats.pops == stats.stale_pops == 0
+                assert 0 < stats.edges_relaxed <= stats.edges_scanned or not stats.found
+                assert set(stats.phases) == {"setup", "search", "path"}
+    finally:
+        compact_graph.stats_callback = None
+    assert len(log) == 20
+
+
+@pytest.mark.parametrize("criteria", ["time", "hops"])
+def test_tabu_stats_sum_leg_searches(compact_graph, criteria):
+    records = []
+    random.seed(0)
+    tabu = Tabu(compact_graph, criteria, stats_callback=records.append)
+    nodes = random.Random(22).sample(compact_graph.nodes, 5)
+    _, _, cost = tabu.tabu_search_v2(nodes[0], nodes[1:], Timestamp.from_seconds(8 * 3600))
+    stats, = records
+    assert stats.cost == cost
+    assert stats.legs_searched > 0
+    assert stats.searches["count"] == stats.legs_searched
+    assert stats.searches["edges_scanned"] > 0
+    assert compact_graph.stats_callback is None
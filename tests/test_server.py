@@ -0,0 +1,66 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import contextlib
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import types
+import pytest
+import client
+import server
+
+
+@pytest.fixture
+def socket_path(compact_graph, monkeypatch):
+    """Server on a short temporary socket path, run in a background thread"""
+    monkeypatch.setitem(server._graphs, "zadanie_1", compact_graph)
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "test.sock")
+    loop = asyncio.new_event_loop()
+    executor = ThreadPoolExecutor(1)
+    task = loop.create_task(server.serve(executor, path, None))
+
+    def run() -> None:
+        with contextlib.suppress(asyncio.CancelledError):
+            loop.run_until_complete(task)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not os.path.exists(path) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    yield path
+    loop.call_soon_threadsafe(task.cancel)
+    thread.join()
+    loop.close()
+    executor.shutdown()
+    shutil.rmtree(directory)
+
+
+def test_round_trip(socket_path, compact_graph):
+    argv = [compact_graph.nodes[0].stop_name, compact_graph.nodes[5].stop_name, "08:00", "t", "-e", "csa"]
+    response = client.request("zadanie_1", argv, socket_path)
+    local = server.run_program("zadanie_1", argv)
+    assert (response["stdout"], response["code"]) == (local["stdout"], local["code"])
+    assert response["code"] == 0 and response["stdout"]
+
+    # invalid request gets an error response instead of closed connection
+    invalid = client.request("unknown", [], socket_path)
+    assert invalid["code"] == 2 and invalid["stdout"] == ""
+
+
+def test_local_fallback_without_server(monkeypatch, tmp_path):
+    calls = []
+    monkeypatch.setattr(
+        client.importlib, "import_module",
+        lambda name: types.SimpleNamespace(main=lambda argv: calls.append((name, argv))),
+    )
+    missing = str(tmp_path / "missing.sock")
+    monkeypatch.setattr(sys, "argv", ["client", "-s", missing, "zadanie_1", "A", "B", "08:00", "t"])
+    with pytest.raises(OSError):
+        client.request("zadanie_1", [], missing)
+    client.main()
+    assert calls == [("zadanie_1", ["A", "B", "08:00", "t"])]
@@ -0,0 +1,85 @@
+import json
+import os
+import numpy as np
+import pytest
+import snapshot
+from graph import Graph
+from snapshot import PREAMBLE, SnapshotError, StaleSnapshotError, load_timetable, save_timetable
+
+
+@pytest.fixture
+def snapshot_path(timetable_csv, compact_graph, tmp_path) -> str:
+    path = str(tmp_path / "graph.snapshot")
+    save_timetable(compact_graph.timetable, path, timetable_csv)
+    return path
+
+
+def header_bounds(path: str):
+    with open(path, "rb") as file:
+        _, _, header_length = PREAMBLE.unpack(file.read(PREAMBLE.size))
+    return PREAMBLE.size, PREAMBLE.size + header_length
+
+
+def test_round_trip(compact_graph, timetable_csv, snapshot_path):
+    loaded = load_timetable(snapshot_path, timetable_csv)
+    original = compact_graph.timetable
+    assert loaded.stop_names == original.stop_names
+    assert loaded.lines == original.lines
+    for name in snapshot.ARRAYS:
+        assert np.array_equal(getattr(loaded, name), getattr(original, name))
+
+
+def test_stale_source(timetable_csv, snapshot_path, tmp_path):
+    changed = tmp_path / "changed.csv"
+    with open(timetable_csv, encoding="utf-8") as file:
+        changed.write_text(file.read() + "\n", encoding="utf-8")
+    with pytest.raises(StaleSnapshotError):
+        load_timetable(snapshot_path, str(changed))
+
+
+@pytest.mark.parametrize("corruption", ["bytes", "missing_field", "bad_array"])
+def test_corrupted_header_raises_snapshot_error(snapshot_path, corruption):
+    start, end = header_bounds(snapshot_path)
+    with open(snapshot_path, "r+b") as file:
+        file.seek(start)
+        header_bytes = file.read(end - start)
+        if corruption == "bytes":
+            header_bytes = bytes(byte ^ 0xFF for byte in header_bytes[:40]) + header_bytes[40:]
+        else:
+            header = json.loads(header_bytes)
+            if corruption == "missing_field":
+                del header["stop_names"]
+            else:
+                header["arrays"]["dest"] = ["not a dtype", 0, 1]
+            header_bytes = json.dumps(header).encode().ljust(end - start)
+        file.seek(start)
+        file.write(header_bytes)
+    with pytest.raises(SnapshotError):
+        load_timetable(snapshot_path)
+
+
+def test_graph_load_rebuilds_corrupted_snapshot(timetable_csv, tmp_path):
+    path = str(tmp_path / "graph.snapshot")
+    Graph.load(timetable_csv, path)
+    start, _ = header_bounds(path)
+    with open(path, "r+b") as file:
+        file.seek(start)
+        file.write(b"\xff\xfe garbage")
+    graph = Graph.load(timetable_csv, path)
+    assert graph.timetable.connection_count > 0
+    load_timetable(path, timetable_csv)
+
+
+def test_touched_source_is_hashed_once(compact_graph, timetable_csv, tmp_path, monkeypatch):
+    source = tmp_path / "copy.csv"
+    source.write_bytes(open(timetable_csv, "rb").read())
+    path = str(tmp_path / "graph.snapshot")
+    save_timetable(compact_graph.timetable, path, str(source))
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    hashes = []
+    original_hash = snapshot.file_hash
+    monkeypatch.setattr(snapshot, "file_hash", lambda path: hashes.append(path) or original_hash(path))
+    load_timetable(path, str(source))
+    load_timetable(path, str(source))
+    assert len(hashes) == 1
@@ -0,0 +1,92 @@
+import random
+import pytest
+import tabu as tabu_module
+from graph import Graph, Timestamp
+from tabu import Tabu
+from tests.conftest import random_queries
+
+
+def test_time_legs_match_connection_scan(compact_graph):
+    tabu = Tabu(compact_graph, 'time')
+    for start, end, start_time in random_queries(compact_graph, 30, seed=13):
+        tabu.tour_nodes = [start, end, *compact_graph.nodes[:5]]
+        path, cost = tabu.get_partial_solution(start, end, start_time)
+        _, _, expected = compact_graph.connection_scan(start, end, start_time)
+        assert cost == expected
+        if path:
+            assert path[0].departure_time.time >= start_time.time
+            assert path[-1].dest is end
+
+
+def test_legs_cached_by_one_scan_match_connection_scan(compact_graph):
+    tabu = Tabu(compact_graph, 'time')
+    for start, end, start_time in random_queries(compact_graph, 10, seed=14):
+        tabu.tour_nodes = [start, end, *compact_graph.nodes[:8]]
+        tabu.get_partial_solution(start, end, start_time)
+        hits = tabu.leg_cache.hits
+        for target in set(tabu.tour_nodes) - {start}:
+            _, cost = tabu.get_partial_solution(start, target, start_time)
+            assert cost == compact_graph.connection_scan(start, target, start_time)[2]
+        assert tabu.leg_cache.hits - hits == len(set(tabu.tour_nodes) - {start})
+
+
+def tour(graph, seed, stops=5):
+    rng = random.Random(seed)
+    nodes = rng.sample(graph.nodes, stops + 1)
+    return tuple(nodes + nodes[:1]), Timestamp.from_seconds(rng.randint(6 * 3600, 12 * 3600))
+
+
+@pytest.mark.parametrize("criteria", ["time", "hops"])
+def test_prefix_reuse_matches_full_evaluation(compact_graph, criteria):
+    tabu = Tabu(compact_graph, criteria, moves=Tabu.MOVE_KINDS)
+    for seed in range(5):
+        solution, start_time = tour(compact_graph, seed)
+        tabu.tour_nodes = list(solution[:-1])
+        base = tabu.evaluate_solution(solution, start_time)
+        if base is None:
+            continue
+        for move in tabu.get_neighbours_v2_1(solution):
+            neighbour = move.apply(solution)
+            reused = tabu.evaluate_solution(neighbour, start_time, base)
+            full = Tabu(compact_graph, criteria).evaluate_solution(neighbour, start_time)
+            assert (reused is None) == (full is None)
+            if full is not None:
+                assert reused.costs == full.costs
+                assert reused.arrivals == full.arrivals
+
+
+def test_evaluation_stops_at_bound(compact_graph):
+    tabu = Tabu(compact_graph, 'time')
+    for seed in range(20):
+        solution, start_time = tour(compact_graph, seed)
+        tabu.tour_nodes = list(solution[:-1])
+        evaluation = tabu.evaluate_solution(solution, start_time)
+        if evaluation is not None:
+            break
+    assert tabu.evaluate_solution(solution, start_time, bound=evaluation.cost) is None
+    assert tabu.evaluate_solution(solution, start_time, bound=evaluation.cost + 1).cost == evaluation.cost
+
+
+@pytest.mark.parametrize("criteria", ["time", "hops"])
+def test_parallel_evaluation_matches_sequential(compact_graph, criteria):
+    results = []
+    for workers in (1, 2):
+        random.seed(3)
+        nodes = random.Random(24).sample(compact_graph.nodes, 6)
+        tabu = Tabu(compact_graph, criteria, workers=workers, moves=('swap', 'or-opt'))
+        try:
+            path, solution, cost = tabu.tabu_search_v2(nodes[0], nodes[1:], Timestamp.from_seconds(8 * 3600))
+        finally:
+            tabu.close()
+        results.append(([node.id for node in solution], cost, len(path or [])))
+    assert results[0] == results[1]
+    assert results[0][1] != float('inf')
+
+
+def test_spawned_workers_need_source_csv(compact_graph, monkeypatch):
+    monkeypatch.setattr(tabu_module.multiprocessing, "get_all_start_methods", lambda: ["spawn"])
+    graph = Graph(None, compact=True, timetable=compact_graph.timetable)
+    with pytest.raises(ValueError, match="source_path"):
+        Tabu(graph, workers=2)
+    Tabu(graph, workers=1)
+    Tabu(compact_graph, workers=2)
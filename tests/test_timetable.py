@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+from timetable import Interner, Timetable, parse_times
+
+
+def test_parse_times():
+    times = pd.Series(["08:15", "08:15:30", "25:00:00"])
+    assert parse_times(times).tolist() == [29700, 29730, 90000]
+
+
+@pytest.mark.parametrize("parse", [parse_times, Interner().ids])
+def test_missing_value_is_rejected(parse):
+    with pytest.raises(ValueError):
+        parse(pd.Series(["08:15", None, "09:00"], name="column"))
+
+
+def test_interner_keeps_ids_across_calls():
+    interner = Interner()
+    assert interner.ids(pd.Series(["b", "a", "b"])).tolist() == [0, 1, 0]
+    assert interner.ids(pd.Series(["c", "a"])).tolist() == [2, 1]
+
+
+def test_build_sorts_rows_by_stop_and_departure():
+    timetable = Timetable.build(
+        ["A", "B", "C"],
+        latitude=[0.0] * 3,
+        longitude=[0.0] * 3,
+        start=[1, 0, 1, 0],
+        departure=[300, 200, 100, 50],
+        arrival=[400, 260, 160, 90],
+        dest=[2, 1, 2, 2],
+        line=[0, 1, 0, 1],
+        company=[0, 0, 0, 0],
+        lines=["1", "2"],
+        companies=["MPK"],
+    )
+    assert timetable.offsets.tolist() == [0, 2, 4, 4]
+    assert timetable.departure.tolist() == [50, 200, 100, 300]
+    assert timetable.arrival.tolist() == [90, 260, 160, 400]
+    assert timetable.dest.tolist() == [2, 1, 2, 2]
+
+
+def test_chunked_load_matches_whole_file(timetable_csv):
+    whole = Timetable.from_csv(timetable_csv)
+    chunked = Timetable.from_csv(timetable_csv, chunk_rows=97)
+    assert chunked.stop_names == whole.stop_names
+    assert chunked.lines == whole.lines
+    assert chunked.companies == whole.companies
+    for name in ("latitude", "longitude", "offsets", "departure", "arrival", "dest", "line", "company"):
+        assert np.allclose(getattr(chunked, name), getattr(whole, name)), name
+
+
+def test_empty_stop_name_is_rejected(timetable_csv, tmp_path):
+    connections = pd.read_csv(timetable_csv, dtype=str)
+    connections.loc[3, "end_stop"] = None
+    path = tmp_path / "broken.csv"
+    connections.to_csv(path, index=False)
+    with pytest.raises(ValueError):
+        Timetable.from_csv(str(path))
+
+
+def test_start_stops_follow_offsets(compact_graph):
+    timetable = compact_graph.timetable
+    start = timetable.start_stops()
+    assert start is timetable.start_stops()
+    assert not start.flags.writeable
+    for stop in range(timetable.stop_count):
+        assert (start[timetable.offsets[stop]:timetable.offsets[stop + 1]] == stop).all()
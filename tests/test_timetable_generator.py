@@ -0,0 +1,28 @@
+import dataclasses
+import pytest
+from graph import Graph
+from timetable import Timetable
+from timetable_generator import GeneratorConfig, generate
+
+CONFIG = GeneratorConfig(stops=30, lines=6, trips_per_day=5, stops_per_line=(6, 12), seed=3)
+
+
+def test_same_seed_gives_identical_csv(tmp_path):
+    first, second, other = (tmp_path / name for name in ("a.csv", "b.csv", "c.csv"))
+    assert generate(str(first), CONFIG) == generate(str(second), CONFIG)
+    assert first.read_bytes() == second.read_bytes()
+    generate(str(other), dataclasses.replace(CONFIG, seed=4))
+    assert other.read_bytes() != first.read_bytes()
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_generated_csv_loads_with_requested_size(tmp_path, compact):
+    path = str(tmp_path / "connection_graph.csv")
+    rows = generate(path, CONFIG)
+    timetable = Timetable.from_csv(path)
+    assert timetable.connection_count == rows
+    assert timetable.stop_count == CONFIG.stops
+    assert len(timetable.lines) == CONFIG.lines
+    assert (timetable.arrival > timetable.departure).all()
+    graph = Graph(path, compact=compact)
+    assert len(graph.nodes) == CONFIG.stops
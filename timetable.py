@@ -0,0 +1,375 @@
+"""
+    Compact array-backed timetable (CSR layout)
+"""
+
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from typing import Dict, Hashable, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+
+
+STOP_ID_DTYPE = np.int32
+TIME_DTYPE = np.int32
+OFFSET_DTYPE = np.int64
+
+CSV_DTYPES = {
+    "company": str,
+    "line": str,
+    "departure_time": str,
+    "arrival_time": str,
+    "start_stop": str,
+    "end_stop": str,
+    "start_stop_lat": np.float64,
+    "start_stop_lon": np.float64,
+    "end_stop_lat": np.float64,
+    "end_stop_lon": np.float64,
+}
+CSV_CHUNK_ROWS = 200_000
+
+
+def parse_times(times: pd.Series) -> np.ndarray:
+    """
+    Vectorized HH:MM[:SS] to seconds conversion,
+    each distinct string is split only once
+    """
+    codes, uniques = pd.factorize(times)
+    if (codes < 0).any():
+        raise ValueError("Invalid time format!")
+    components = pd.Series(uniques).str.split(":", expand=True)
+    if components.shape[1] not in (2, 3) or components[[0, 1]].isna().any(axis=None):
+        raise ValueError("Invalid time format!")
+    components = components.fillna("0").astype(TIME_DTYPE)
+    seconds = components[0] * 3600 + components[1] * 60
+    if components.shape[1] == 3:
+        seconds += components[2]
+    return seconds.to_numpy(TIME_DTYPE)[codes]
+
+
+class Interner(dict):
+    """Assigns consecutive ids to values in order of first appearance"""
+
+    def ids(self, values: pd.Series) -> np.ndarray:
+        codes, uniques = pd.factorize(values)
+        # factorize codes missing values as -1, which would index the last id
+        if (codes < 0).any():
+            raise ValueError(f"Missing value in column {values.name}!")
+        mapping = np.fromiter(
+            (self.setdefault(value, len(self)) for value in uniques),
+            dtype=STOP_ID_DTYPE,
+            count=len(uniques),
+        )
+        return mapping[codes]
+
+
+def _accumulate(
+    total: np.ndarray, ids: np.ndarray, weights: Optional[np.ndarray], size: int
+) -> np.ndarray:
+    total = np.pad(total, (0, size - len(total)))
+    total += np.bincount(ids, weights, minlength=size)
+    return total
+
+
+@dataclass
+class Timetable:
+    """
+    Connections of all stops stored in contiguous columns.
+    Rows are sorted by start stop and then by departure, so connections
+    of stop `s` are rows offsets[s]:offsets[s+1] of every column.
+    Stop, line and company names are interned into integer ids.
+    """
+
+    stop_names: List[str]
+    latitude: np.ndarray
+    longitude: np.ndarray
+    offsets: np.ndarray
+    departure: np.ndarray
+    arrival: np.ndarray
+    dest: np.ndarray
+    line: np.ndarray
+    company: np.ndarray
+    lines: List[Hashable]
+    companies: List[Hashable]
+    stop_ids: Dict[str, int] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.stop_ids = {name: i for i, name in enumerate(self.stop_names)}
+        self.has_next_departure_table = False
+        self.has_scan_arrays = False
+        self.has_reverse_index = False
+        self._start_stops: Optional[np.ndarray] = None
+        self.refresh_views()
+
+    def refresh_views(self) -> None:
+        """
+        Memoryviews of the columns, indexing them from python loops
+        returns plain ints and is much faster than numpy scalar access
+        """
+        self.offsets_view = memoryview(self.offsets)
+        self.departure_view = memoryview(self.departure)
+        self.arrival_view = memoryview(self.arrival)
+        self.dest_view = memoryview(self.dest)
+        self.line_view = memoryview(self.line)
+        self.company_view = memoryview(self.company)
+
+    @classmethod
+    def build(
+        cls,
+        stop_names: List[str],
+        latitude: Sequence[float],
+        longitude: Sequence[float],
+        start: Sequence[int],
+        departure: Sequence[int],
+        arrival: Sequence[int],
+        dest: Sequence[int],
+        line: Sequence[int],
+        company: Sequence[int],
+        lines: List[Hashable],
+        companies: List[Hashable],
+    ) -> "Timetable":
+        """Sorts unordered connection columns into CSR layout"""
+        start = np.asarray(start, dtype=STOP_ID_DTYPE)
+        departure = np.asarray(departure, dtype=TIME_DTYPE)
+        order = np.lexsort((departure, start))
+        counts = np.bincount(start, minlength=len(stop_names))
+        offsets = np.zeros(len(stop_names) + 1, dtype=OFFSET_DTYPE)
+        np.cumsum(counts, out=offsets[1:])
+        return cls(
+            stop_names,
+            np.asarray(latitude, dtype=np.float64),
+            np.asarray(longitude, dtype=np.float64),
+            offsets,
+            departure[order],
+            np.asarray(arrival, dtype=TIME_DTYPE)[order],
+            np.asarray(dest, dtype=STOP_ID_DTYPE)[order],
+            np.asarray(line, dtype=STOP_ID_DTYPE)[order],
+            np.asarray(company, dtype=STOP_ID_DTYPE)[order],
+            lines,
+            companies,
+        )
+
+    @classmethod
+    def from_csv(cls, filepath: str, chunk_rows: int = CSV_CHUNK_ROWS) -> "Timetable":
+        """
+        Reads connection CSV in chunks of `chunk_rows` rows.
+        Peak memory is bounded by one parsed chunk (about 300 B per row
+        with pandas string columns, ~60 MB for the default chunk size)
+        plus at most 80 B per connection for the int32 columns, their
+        concatenated copies and the sort permutation. It does not depend
+        on the CSV text size (830k rows load in ~80 MB above interpreter).
+        Stop ids follow sorted stop names, stop coordinates are mean
+        of all rows mentioning the stop
+        """
+        stops, lines, companies = Interner(), Interner(), Interner()
+        latitude_sum = np.zeros(0)
+        longitude_sum = np.zeros(0)
+        mentions = np.zeros(0)
+        columns: Dict[str, List[np.ndarray]] = {
+            name: [] for name in ("start", "departure", "arrival", "dest", "line", "company")
+        }
+        chunks = pd.read_csv(
+            filepath,
+            usecols=list(CSV_DTYPES),
+            dtype=CSV_DTYPES,
+            chunksize=chunk_rows,
+        )
+        for chunk in chunks:
+            start = stops.ids(chunk["start_stop"])
+            dest = stops.ids(chunk["end_stop"])
+            for ids, prefix in ((start, "start_stop"), (dest, "end_stop")):
+                latitude_sum = _accumulate(
+                    latitude_sum, ids, chunk[f"{prefix}_lat"].to_numpy(), len(stops)
+                )
+                longitude_sum = _accumulate(
+                    longitude_sum, ids, chunk[f"{prefix}_lon"].to_numpy(), len(stops)
+                )
+                mentions = _accumulate(mentions, ids, None, len(stops))
+            columns["start"].append(start)
+            columns["dest"].append(dest)
+            columns["departure"].append(parse_times(chunk["departure_time"]))
+            columns["arrival"].append(parse_times(chunk["arrival_time"]))
+            columns["line"].append(lines.ids(chunk["line"]))
+            columns["company"].append(companies.ids(chunk["company"]))
+            del chunk
+
+        names = list(stops)
+        order = np.array(sorted(range(len(names)), key=names.__getitem__), dtype=STOP_ID_DTYPE)
+        renumber = np.empty_like(order)
+        renumber[order] = np.arange(len(order), dtype=STOP_ID_DTYPE)
+        merged = {name: np.concatenate(parts) if parts else np.zeros(0, STOP_ID_DTYPE)
+                  for name, parts in columns.items()}
+        del columns
+        return cls.build(
+            [names[stop] for stop in order],
+            latitude_sum[order] / mentions[order],
+            longitude_sum[order] / mentions[order],
+            renumber[merged.pop("start")],
+            merged.pop("departure"),
+            merged.pop("arrival"),
+            renumber[merged.pop("dest")],
+            merged.pop("line"),
+            merged.pop("company"),
+            list(lines),
+            list(companies),
+        )
+
+    @property
+    def stop_count(self) -> int:
+        return len(self.stop_names)
+
+    @property
+    def connection_count(self) -> int:
+        return len(self.departure)
+
+    def start_stops(self) -> np.ndarray:
+        """Start stop of every row, computed once and read-only"""
+        if self._start_stops is None:
+            start = np.repeat(
+                np.arange(self.stop_count, dtype=STOP_ID_DTYPE), np.diff(self.offsets)
+            )
+            start.flags.writeable = False
+            self._start_stops = start
+        return self._start_stops
+
+    def out_degree(self, stop: int) -> int:
+        return self.offsets_view[stop + 1] - self.offsets_view[stop]
+
+    def connections(self, stop: int) -> range:
+        """Row indices of connections leaving `stop`"""
+        return range(self.offsets_view[stop], self.offsets_view[stop + 1])
+
+    def first_departure(self, stop: int, time: int) -> int:
+        """First row of `stop` departing at or after `time`"""
+        return bisect_left(
+            self.departure_view, time, self.offsets_view[stop], self.offsets_view[stop + 1]
+        )
+
+    def previous_departure(self, stop: int, time: int) -> int:
+        """Latest departure from `stop` before `time`, -1 when there is none"""
+        row = self.first_departure(stop, time) - 1
+        return self.departure_view[row] if row >= self.offsets_view[stop] else -1
+
+    def build_next_departure_table(self) -> None:
+        """
+        Groups rows of every stop by (dest, line), inside a group
+        rows keep departure order. Group g of stop s is one of
+        stop_groups[s]:stop_groups[s+1], its rows are
+        group_rows[group_offsets[g]:group_offsets[g+1]]
+        """
+        start = self.start_stops()
+        rows = np.arange(self.connection_count, dtype=STOP_ID_DTYPE)
+        order = np.lexsort((rows, self.line, self.dest, start))
+        key_changes = np.flatnonzero(
+            (np.diff(start[order]) != 0)
+            | (np.diff(self.dest[order]) != 0)
+            | (np.diff(self.line[order]) != 0)
+        ) + 1
+        group_starts = np.concatenate(([0], key_changes)) if len(order) else key_changes
+        self.group_rows = order.astype(STOP_ID_DTYPE)
+        self.group_departure = self.departure[order]
+        self.group_offsets = np.append(group_starts, len(order)).astype(OFFSET_DTYPE)
+        self.stop_groups = np.searchsorted(
+            group_starts, self.offsets, side="left"
+        ).astype(OFFSET_DTYPE)
+        self.group_rows_view = memoryview(self.group_rows)
+        self.group_departure_view = memoryview(self.group_departure)
+        self.group_offsets_view = memoryview(self.group_offsets)
+        self.stop_groups_view = memoryview(self.stop_groups)
+        self.has_next_departure_table = True
+
+    def next_departures(self, stop: int, time: int) -> List[int]:
+        """
+        Earliest row departing at or after `time` towards each (dest, line)
+        of `stop`, in departure order. Later rows of the same line to
+        the same stop cannot arrive earlier unless vehicles overtake
+        """
+        group_rows = self.group_rows_view
+        group_departure = self.group_departure_view
+        group_offsets = self.group_offsets_view
+        rows = []
+        for group in range(self.stop_groups_view[stop], self.stop_groups_view[stop + 1]):
+            last = group_offsets[group + 1]
+            position = bisect_left(group_departure, time, group_offsets[group], last)
+            if position < last:
+                rows.append(group_rows[position])
+        rows.sort()
+        return rows
+
+    def build_reverse_index(self) -> None:
+        """
+        Incoming connections of every stop grouped by their start stop,
+        inside a group ordered by arrival. Group g of stop s is one of
+        in_stop_groups[s]:in_stop_groups[s+1], its positions are
+        in_group_offsets[g]:in_group_offsets[g+1]. For each position
+        in_best_departure and in_best_row are the latest departure of the
+        group arriving no later than it and its row, so overtaking
+        vehicles need no special care
+        """
+        if self.has_reverse_index:
+            return
+        start = self.start_stops()
+        order = np.lexsort((self.arrival, start, self.dest))
+        dest = self.dest[order]
+        origin = start[order]
+        departure = self.departure[order].astype(np.int64)
+        key_changes = np.flatnonzero((np.diff(dest) != 0) | (np.diff(origin) != 0)) + 1
+        group_starts = np.concatenate(([0], key_changes)) if len(order) else key_changes
+        group = np.zeros(len(order), dtype=np.int64)
+        group[key_changes] = 1
+        np.cumsum(group, out=group)
+        # shifting every group above the previous one restarts running maximum
+        shift = group * (int(departure.max(initial=0)) + 1)
+        best_departure = np.maximum.accumulate(departure + shift) - shift
+        positions = np.arange(len(order))
+        best_position = np.maximum.accumulate(np.where(departure == best_departure, positions, 0))
+        in_offsets = np.zeros(self.stop_count + 1, dtype=OFFSET_DTYPE)
+        np.cumsum(np.bincount(self.dest, minlength=self.stop_count), out=in_offsets[1:])
+        self.in_stop_groups = np.searchsorted(group_starts, in_offsets, side="left").astype(OFFSET_DTYPE)
+        self.in_group_offsets = np.append(group_starts, len(order)).astype(OFFSET_DTYPE)
+        self.in_start = origin
+        self.in_arrival = self.arrival[order]
+        self.in_best_departure = best_departure.astype(TIME_DTYPE)
+        self.in_best_row = order[best_position].astype(STOP_ID_DTYPE)
+        self.in_stop_groups_view = memoryview(self.in_stop_groups)
+        self.in_group_offsets_view = memoryview(self.in_group_offsets)
+        self.in_start_view = memoryview(self.in_start)
+        self.in_arrival_view = memoryview(self.in_arrival)
+        self.in_best_departure_view = memoryview(self.in_best_departure)
+        self.in_best_row_view = memoryview(self.in_best_row)
+        self.has_reverse_index = True
+
+    def latest_departures(self, stop: int, time: int) -> List[int]:
+        """
+        Reverse index position of the latest departure towards `stop`
+        arriving at or before `time`, one for each start stop
+        """
+        group_offsets = self.in_group_offsets_view
+        arrival = self.in_arrival_view
+        positions = []
+        for group in range(self.in_stop_groups_view[stop], self.in_stop_groups_view[stop + 1]):
+            first = group_offsets[group]
+            position = bisect_right(arrival, time, first, group_offsets[group + 1]) - 1
+            if position >= first:
+                positions.append(position)
+        return positions
+
+    def build_scan_arrays(self) -> None:
+        """
+        Copies of the columns ordered by (departure, arrival) for linear
+        connection scans, scan_rows maps scan position back to row
+        """
+        if self.has_scan_arrays:
+            return
+        start = self.start_stops()
+        order = np.lexsort((self.arrival, self.departure))
+        self.scan_rows = order.astype(STOP_ID_DTYPE)
+        self.scan_departure = self.departure[order]
+        self.scan_arrival = self.arrival[order]
+        self.scan_start = start[order]
+        self.scan_dest = self.dest[order]
+        self.scan_rows_view = memoryview(self.scan_rows)
+        self.scan_departure_view = memoryview(self.scan_departure)
+        self.scan_arrival_view = memoryview(self.scan_arrival)
+        self.scan_start_view = memoryview(self.scan_start)
+        self.scan_dest_view = memoryview(self.scan_dest)
+        self.has_scan_arrays = True
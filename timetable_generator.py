@@ -0,0 +1,205 @@
+"""
+    Synthetic timetables in connection_graph.csv layout for scaling experiments.
+    Rows are streamed to the file, memory depends on number of stops
+    and lines only, so files with 10^7+ rows can be generated
+"""
+
+import argparse
+from dataclasses import dataclass
+import math
+from typing import Iterator, List, Optional, TextIO, Tuple
+import numpy as np
+
+CSV_HEADER = ",company,line,departure_time,arrival_time,start_stop,end_stop,start_stop_lat,start_stop_lon,end_stop_lat,end_stop_lon\n"
+COMPANIES = ("MPK Autobusy", "MPK Tramwaje")
+KM_PER_DEGREE = 111.32
+
+
+@dataclass
+class GeneratorConfig:
+    """
+    `trips_per_day` runs in each direction of every line, departing evenly
+    between `first_departure` and `last_departure` (seconds from 00:00).
+    Stop popularity follows Zipf law with exponent `hub_skew`, most popular
+    stops lie near the centre and are shared by many lines, 0 means uniform.
+    Every stop is served when lines have enough stops in total
+    """
+
+    stops: int = 1_000
+    lines: int = 50
+    trips_per_day: int = 60
+    hub_skew: float = 1.0
+    stops_per_line: Tuple[int, int] = (8, 30)
+    radius_km: float = 10.0
+    center: Tuple[float, float] = (51.11, 17.03)
+    speed_kmh: float = 25.0
+    dwell_seconds: int = 30
+    first_departure: int = 5 * 3600
+    last_departure: int = 23 * 3600
+    seed: int = 0
+
+    @property
+    def estimated_rows(self) -> int:
+        average_stops = sum(self.stops_per_line) / 2
+        return int(self.lines * 2 * self.trips_per_day * (average_stops - 1))
+
+
+@dataclass
+class Line:
+    company: str
+    name: str
+    stops: List[int]
+    hop_seconds: List[int]
+    first_departure: int
+    headway: float
+
+
+def time_str(seconds: int) -> str:
+    minutes, s = divmod(seconds, 60)
+    h, m = divmod(minutes, 60)
+    return f"{h:02d}:{m:02d}:{s:02d}"
+
+
+class TimetableGenerator:
+    def __init__(self, config: GeneratorConfig) -> None:
+        if config.stops < 2:
+            raise ValueError("At least 2 stops are required")
+        self.config = config
+        self.rng = np.random.default_rng(config.seed)
+        # uniform points of disc, ordered from the centre outwards
+        distance_km = config.radius_km * np.sqrt(np.sort(self.rng.random(config.stops)))
+        angle = self.rng.random(config.stops) * 2 * math.pi
+        self.x_km = distance_km * np.cos(angle)
+        self.y_km = distance_km * np.sin(angle)
+        center_latitude, center_longitude = config.center
+        self.latitude = center_latitude + self.y_km / KM_PER_DEGREE
+        self.longitude = center_longitude + self.x_km / (
+            KM_PER_DEGREE * math.cos(math.radians(center_latitude))
+        )
+        weights = 1 / np.arange(1, config.stops + 1) ** config.hub_skew
+        self.popularity = weights / weights.sum()
+        self.coordinates = [
+            f"{latitude:.8f},{longitude:.8f}"
+            for latitude, longitude in zip(self.latitude.tolist(), self.longitude.tolist())
+        ]
+        self.unserved = self.rng.permutation(config.stops).tolist()
+
+    def create_line(self, line_id: int) -> Line:
+        """
+        Stops are drawn by popularity, together with share of stops not
+        served yet, and visited along random direction. Hop time comes
+        from distance, so trips of a line never overtake
+        """
+        config = self.config
+        low, high = config.stops_per_line
+        count = int(self.rng.integers(low, high + 1))
+        count = max(2, min(count, config.stops))
+        share = math.ceil(len(self.unserved) / (config.lines - line_id))
+        assigned = set(self.unserved[:min(share, count - 1)])
+        del self.unserved[:len(assigned)]
+        popularity = self.popularity.copy()
+        popularity[list(assigned)] = 0
+        drawn = self.rng.choice(
+            config.stops, size=count - len(assigned), replace=False, p=popularity / popularity.sum()
+        )
+        served = set(drawn.tolist())
+        self.unserved = [stop for stop in self.unserved if stop not in served]
+        stops = np.concatenate((np.array(sorted(assigned), dtype=int), drawn))
+        direction = self.rng.random() * 2 * math.pi
+        projection = self.x_km[stops] * math.cos(direction) + self.y_km[stops] * math.sin(direction)
+        stops = stops[np.argsort(projection)]
+        hop_km = np.hypot(np.diff(self.x_km[stops]), np.diff(self.y_km[stops]))
+        hop_seconds = np.maximum(
+            60, np.rint(hop_km / config.speed_kmh * 3600) + config.dwell_seconds
+        ).astype(int)
+        headway = (config.last_departure - config.first_departure) / max(config.trips_per_day, 1)
+        first_departure = config.first_departure + self.rng.random() * headway
+        return Line(
+            COMPANIES[line_id % len(COMPANIES)],
+            str(100 + line_id),
+            stops.tolist(),
+            hop_seconds.tolist(),
+            int(first_departure),
+            headway,
+        )
+
+    def lines(self) -> Iterator[Line]:
+        for line_id in range(self.config.lines):
+            yield self.create_line(line_id)
+
+    def write(self, file: TextIO) -> int:
+        """Writes CSV with header to open `file`, returns number of rows"""
+        file.write(CSV_HEADER)
+        times: List[str] = []
+        row = 0
+        for line in self.lines():
+            prefix = f"{line.company},{line.name},"
+            for stops, hop_seconds in (
+                (line.stops, line.hop_seconds),
+                (line.stops[::-1], line.hop_seconds[::-1]),
+            ):
+                hops = [self._hop_columns(start, end) for start, end in zip(stops, stops[1:])]
+                for trip in range(self.config.trips_per_day):
+                    departure = int(line.first_departure + trip * line.headway)
+                    rows = []
+                    for hop, seconds in zip(hops, hop_seconds):
+                        arrival = departure + seconds
+                        if arrival >= len(times):
+                            times.extend(time_str(t) for t in range(len(times), arrival + 3600))
+                        rows.append(f"{row},{prefix}{times[departure]},{times[arrival]},{hop}\n")
+                        row += 1
+                        departure = arrival
+                    file.writelines(rows)
+        return row
+
+    def _hop_columns(self, start: int, end: int) -> str:
+        return f"Stop {start},Stop {end},{self.coordinates[start]},{self.coordinates[end]}"
+
+
+def generate(path: str, config: Optional[GeneratorConfig] = None) -> int:
+    """Writes synthetic timetable to `path`, returns number of rows"""
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        return TimetableGenerator(config or GeneratorConfig()).write(file)
+
+
+def get_args():
+    defaults = GeneratorConfig()
+    parser = argparse.ArgumentParser(
+        prog="timetable_generator",
+        description="Generator syntetycznych rozkładów jazdy w formacie connection_graph.csv",
+    )
+    parser.add_argument("output", help="Plik wynikowy CSV")
+    parser.add_argument("--stops", help="Liczba przystanków", type=int, default=defaults.stops)
+    parser.add_argument("--lines", help="Liczba linii", type=int, default=defaults.lines)
+    parser.add_argument(
+        "--trips", help="Liczba kursów dziennie w każdym kierunku linii", type=int, default=defaults.trips_per_day
+    )
+    parser.add_argument(
+        "--hub-skew", help="Wykładnik rozkładu Zipfa popularności przystanków", type=float, default=defaults.hub_skew
+    )
+    parser.add_argument(
+        "--stops-per-line", help="Minimalna i maksymalna liczba przystanków linii", type=int, nargs=2,
+        default=defaults.stops_per_line,
+    )
+    parser.add_argument("--radius", help="Promień obszaru w km", type=float, default=defaults.radius_km)
+    parser.add_argument("--seed", help="Ziarno generatora", type=int, default=defaults.seed)
+    return parser.parse_args()
+
+
+def main():
+    args = get_args()
+    config = GeneratorConfig(
+        stops=args.stops,
+        lines=args.lines,
+        trips_per_day=args.trips,
+        hub_skew=args.hub_skew,
+        stops_per_line=tuple(args.stops_per_line),
+        radius_km=args.radius,
+        seed=args.seed,
+    )
+    rows = generate(args.output, config)
+    print(f"Zapisano {rows} połączeń do {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,7 +2,7 @@ import argparse
 import re
 import sys
 import time
-from typing import List
+from typing import List, Optional, Tuple
 from graph import Edge, Graph, Node, Timestamp
 
 DATA_FILE_PATH = "connection_graph.csv"
@@ -18,7 +18,7 @@ def validate_time_format(time_str):
         raise argparse.ArgumentTypeError(msg)
    
 
-def get_args():
+def get_args(argv: Optional[List[str]] = None):
     parser = argparse.ArgumentParser(
         prog="zadanie_1",
         description="""
@@ -29,7 +29,9 @@ def get_args():
     )
     parser.add_argument("a", help="Przystanek startowy")
     parser.add_argument("b", help="Przystanek docelowy")
-    parser.add_argument("t", help="Czas pojawienia się na przystanku startowym (HH:MM[:SS])")
+    parser.add_argument(
+        "t", help="Czas pojawienia się na przystanku startowym (HH:MM[:SS]), z -a czas przyjazdu do docelowego"
+    )
     parser.add_argument(
         "k",
         help="Kryterium optymalizacyjne t - optymalizacja czasu, p - optymalizacja ścieżki",
@@ -37,7 +39,24 @@ def get_args():
         default="t",
     )
     parser.add_argument('-d', '--detail', help="Wypisz dokładną ścieżkę krok po kroku", action="store_true")
-    return parser.parse_args() 
+    parser.add_argument(
+        '-e', '--engine',
+        help="""Algorytm wyszukiwania, csa - Connection Scan (tylko dla kryterium t),
+            raptor - wszystkie opcje najszybsze/najmniej przesiadek naraz""",
+        choices=["a_star", "csa", "raptor"],
+        default="a_star",
+    )
+    parser.add_argument(
+        '-a', '--arrive-by',
+        help="Szukaj najpóźniejszego odjazdu, który dojeżdża na przystanek docelowy do czasu t",
+        action="store_true",
+    )
+    args = parser.parse_args(argv)
+    if args.engine == "csa" and args.k != "t":
+        parser.error("Connection Scan obsługuje tylko kryterium t")
+    if args.arrive_by and (args.k != "t" or args.engine != "a_star"):
+        parser.error("Wyszukiwanie po czasie przyjazdu obsługuje tylko kryterium t i silnik a_star")
+    return args
 
 
 def get_node(graph: Graph, stop_name) -> Node:
@@ -70,19 +89,49 @@ def print_detailed_solution(path: List[Edge], start_stop: str):
 
 
 
-def main():
-    args = get_args()
+def pick_raptor_journey(journeys: List[Tuple[List[Edge], int, int]], criteria: str):
+    """
+    Lists all Pareto optimal options, picks fastest for time criteria
+    and the one with fewest transfers otherwise
+    """
+    if not journeys:
+        return None, None
+    for _, transfers, travel_time in journeys:
+        print(f"Opcja: przesiadki {transfers}, czas podróży {travel_time}", file=sys.stderr)
+    path, transfers, travel_time = journeys[-1] if criteria == 'time' else journeys[0]
+    return path, travel_time if criteria == 'time' else transfers
+
+
+def load_graph() -> Graph:
+    return Graph.load(
+        DATA_FILE_PATH,
+        cost_estimation_scale=COST_ESTIMATION_SCALE,
+        hop_penalty=HOP_PENALTY,
+    )
+
+
+def main(argv: Optional[List[str]] = None, graph: Optional[Graph] = None):
+    """`graph` is reused by server.py, otherwise it is loaded from DATA_FILE_PATH"""
+    args = get_args(argv)
     
     start_stop_name = args.a
     end_stop_name = args.b
     start_time = Timestamp.create_timestamp(args.t)
     criteria = 'time' if args.k == 't' else 'hops' 
     
-    graph = Graph(DATA_FILE_PATH, COST_ESTIMATION_SCALE, HOP_PENALTY)
+    if graph is None:
+        graph = load_graph()
     alghoritm_start = time.time()
     start = get_node(graph, start_stop_name)
     end = get_node(graph, end_stop_name)
-    path, _, cost = graph.a_star(start, end, start_time, criteria)
+    if args.arrive_by:
+        path, _, cost = graph.latest_departure(start, end, start_time)
+    elif args.engine == "csa":
+        path, _, cost = graph.connection_scan(start, end, start_time)
+    elif args.engine == "raptor":
+        path, cost = pick_raptor_journey(graph.raptor(start, end, start_time), criteria)
+    else:
+        path, _, cost = graph.a_star(start, end, start_time, criteria)
     alghoritm_end = time.time()
     print(f"Czas algorytmu {alghoritm_end-alghoritm_start}\nWartość funkcji kosztu {cost}", file=sys.stderr)
     if not path:
@@ -2,8 +2,9 @@ import argparse
 import re
 import sys
 import time
-from typing import List
+from typing import List, Optional
 from graph import Edge, Graph, Node, Timestamp
+from held_karp import HeldKarp
 from tabu import Tabu
 
 
@@ -20,7 +21,7 @@ def validate_time_format(time_str):
         raise argparse.ArgumentTypeError(msg)
    
 
-def get_args():
+def get_args(argv: Optional[List[str]] = None):
     parser = argparse.ArgumentParser(
         prog="zadanie_2",
         description="""
@@ -39,7 +40,22 @@ def get_args():
         default="t",
     )
     parser.add_argument('-d', '--detail', help="Wypisz dokładną ścieżkę krok po kroku", action="store_true")
-    return parser.parse_args() 
+    parser.add_argument(
+        '-w',
+        '--workers',
+        help="Liczba procesów oceniających sąsiedztwo (domyślnie 1)",
+        type=int,
+        default=1,
+    )
+    parser.add_argument(
+        '-m',
+        '--moves',
+        help="Rodzaje ruchów przeszukiwania tabu (domyślnie swap)",
+        nargs='+',
+        choices=Tabu.MOVE_KINDS,
+        default=['swap'],
+    )
+    return parser.parse_args(argv)
 
 
 def get_node(graph: Graph, stop_name) -> Node:
@@ -77,21 +93,38 @@ def get_stop_nodes(nodes_str:List[str], graph: Graph) -> List[Node]:
         get_node(graph, node_str) for node_str in nodes_str 
     ]
 
-def main():
-    args = get_args()
+def load_graph() -> Graph:
+    return Graph.load(
+        DATA_FILE_PATH,
+        cost_estimation_scale=COST_ESTIMATION_SCALE,
+        hop_penalty=HOP_PENALTY,
+    )
+
+
+def main(argv: Optional[List[str]] = None, graph: Optional[Graph] = None):
+    """`graph` is reused by server.py, otherwise it is loaded from DATA_FILE_PATH"""
+    args = get_args(argv)
     
     start_stop_name = args.a
     end_stop_name_list_str = args.b
     end_stop_name_list = end_stop_name_list_str.split(';') 
     start_time = Timestamp.create_timestamp(args.t)
     criteria = 'time' if args.k == 't' else 'hops' 
-    graph = Graph(DATA_FILE_PATH, COST_ESTIMATION_SCALE, HOP_PENALTY)
-    tabu = Tabu(graph, criteria)
+    if graph is None:
+        graph = load_graph()
     alghoritm_start = time.time()
     start = get_node(graph, start_stop_name)
     stop_nodes = get_stop_nodes(end_stop_name_list, graph)
+    if criteria == 'time' and len(stop_nodes) <= HeldKarp.MAX_STOPS:
+        # exact and faster than the metaheuristic for small tours
+        tabu = HeldKarp(graph, criteria)
+    else:
+        tabu = Tabu(graph, criteria, workers=args.workers, moves=args.moves)
     tabu.TABU_LEN = len(stop_nodes)-1
-    path, solution, cost =tabu.tabu_search_v2(start, stop_nodes, start_time)
+    try:
+        path, solution, cost =tabu.tabu_search_v2(start, stop_nodes, start_time)
+    finally:
+        tabu.close()
     alghoritm_end = time.time()
     print(f"Czas algorytmu {alghoritm_end-alghoritm_start}\nWartość funkcji kosztu {cost}", file=sys.stderr)
     if not path: